@@ -2,16 +2,57 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, time
 import os
+import hashlib
 from pathlib import Path
 
-# Import services
-from services.image_generator import ImageGenerator
-from services.email_sender import EmailSender
-from services.scheduler import EmailScheduler
-from config.settings import Settings
+# Import services. Image, sending, retry and pipeline services are imported
+# where they are used, so importing this script loads none of them; the
+# scheduler (and with it smtplib) is still built on the first render, and
+# Streamlit itself already imports PIL.
+from services.excel_service import SUPPORTED_TYPES, import_recipients, load_recipients
+from services.campaign import CampaignPlan
+from config.constants import IMAGE_ENCODINGS, SCHEDULED_PAGE_SIZE
+from config.settings import get_settings
+from utils.logger import STAGES, metrics
 
-# Initialize settings
-settings = Settings()
+# Shared settings; config.json is only re-read after it changes
+settings = get_settings()
+
+def get_plan(send_mode):
+    """Campaign plan for the imported data, built once per import and send mode"""
+    plan_key = (st.session_state.get('import_key'), send_mode)
+    if st.session_state.get('plan_key') != plan_key:
+        st.session_state.plan = CampaignPlan.from_dataframe(st.session_state.df, send_mode)
+        st.session_state.plan_key = plan_key
+    return st.session_state.plan
+
+@st.cache_resource
+def get_scheduler():
+    """One scheduler per server process; it owns the persisted job store"""
+    from services.scheduler import EmailScheduler
+    scheduler = EmailScheduler(send_workers=settings.SEND_WORKERS, rate_limit=settings.RATE_LIMIT)
+    # Running, so jobs queued by 'smartmailer run' are picked up too
+    scheduler.start()
+    return scheduler
+
+@st.cache_data(max_entries=16)
+def get_encoding_report(template_path, template_digest, name, date, style, encoding):
+    """Sample attachment size per format; re-run only when an input changes"""
+    from services.image_generator import ImageGenerator
+    generator = ImageGenerator(template_path, **encoding)
+    return generator.encoding_report(name, date, **style)
+
+@st.cache_resource
+def get_journal():
+    """Shared send journal; records which campaign messages were accepted"""
+    from services.send_journal import SendJournal
+    return SendJournal()
+
+@st.cache_resource
+def get_ledger():
+    """Shared per-account daily usage, for sender account quotas"""
+    from services.account_pool import QuotaLedger
+    return QuotaLedger()
 
 # Page config
 st.set_page_config(
@@ -25,8 +66,10 @@ if 'df' not in st.session_state:
     st.session_state.df = None
 if 'generated_images' not in st.session_state:
     st.session_state.generated_images = {}
+if 'render_settings' not in st.session_state:
+    st.session_state.render_settings = None
 if 'scheduler' not in st.session_state:
-    st.session_state.scheduler = EmailScheduler()
+    st.session_state.scheduler = get_scheduler()
 
 # Title
 st.title("📧 SmartMailer")
@@ -40,6 +83,40 @@ with st.sidebar:
     sender_password = st.text_input("Email Password", type="password", value=settings.SENDER_PASSWORD)
     smtp_server = st.text_input("SMTP Server", value=settings.SMTP_SERVER)
     smtp_port = st.number_input("SMTP Port", value=settings.SMTP_PORT, min_value=1, max_value=65535)
+    daily_quota = st.number_input(
+        "Daily Quota",
+        value=settings.DAILY_QUOTA,
+        min_value=0,
+        help="Messages per day this account may send. 0 = unlimited."
+    )
+    
+    with st.expander("📮 Extra Sender Accounts"):
+        st.caption(
+            "Campaigns are spread across all accounts by remaining quota. "
+            "An account that gets throttled is paused and its emails move to the others."
+        )
+        extra_accounts = st.data_editor(
+            pd.DataFrame(
+                settings.SENDER_ACCOUNTS,
+                columns=['sender_email', 'sender_password', 'smtp_server', 'smtp_port', 'rate_limit', 'daily_quota']
+            ),
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={
+                'sender_email': st.column_config.TextColumn("Email"),
+                'sender_password': st.column_config.TextColumn("Password"),
+                'smtp_server': st.column_config.TextColumn("SMTP Server", default="smtp.gmail.com"),
+                'smtp_port': st.column_config.NumberColumn("Port", default=587, min_value=1, max_value=65535),
+                'rate_limit': st.column_config.NumberColumn("Emails/sec", default=1.0, min_value=0.0),
+                'daily_quota': st.column_config.NumberColumn("Daily Quota", default=0, min_value=0)
+            },
+            key="extra_accounts"
+        )
+        extra_accounts = [
+            {key: (None if pd.isna(value) else value) for key, value in row.items()}
+            for row in extra_accounts.to_dict('records')
+            if row.get('sender_email') and row.get('smtp_server')
+        ]
     
     st.markdown("---")
     st.header("🎨 Image Settings")
@@ -50,48 +127,156 @@ with st.sidebar:
         help="Combine: One image with all dates. Separate: Individual images per date."
     )
     
+    encoding_labels = {
+        'png': "PNG (lossless)",
+        'png8': "PNG, 256 colors",
+        'jpeg': "JPEG",
+        'webp': "WebP"
+    }
+    image_format = st.selectbox(
+        "Attachment Format",
+        IMAGE_ENCODINGS,
+        index=IMAGE_ENCODINGS.index(settings.IMAGE_FORMAT),
+        format_func=encoding_labels.get,
+        help="Smaller attachments upload faster and stay under SMTP size limits."
+    )
+    image_quality = st.slider(
+        "Quality",
+        10, 100, settings.IMAGE_QUALITY,
+        disabled=image_format not in ('jpeg', 'webp')
+    )
+    image_max_dimension = st.number_input(
+        "Max Image Size (px)",
+        value=settings.IMAGE_MAX_DIMENSION,
+        min_value=0,
+        max_value=10000,
+        step=100,
+        help="Longest side of the attachment. 0 = template size."
+    )
+    image_flatten = st.checkbox(
+        "Remove Transparency",
+        value=settings.IMAGE_FLATTEN,
+        help="Flatten onto white (JPEG always does)."
+    )
+    image_encoding = {
+        'encoding': image_format,
+        'quality': image_quality,
+        'max_dimension': image_max_dimension or None,
+        'flatten': image_flatten
+    }
+    
+    st.markdown("---")
+    st.header("⚡ Performance")
+    
+    send_workers = st.number_input("Parallel Send Workers", value=settings.SEND_WORKERS, min_value=1, max_value=32)
+    rate_limit = st.number_input(
+        "Rate Limit (emails/sec)",
+        value=float(settings.RATE_LIMIT),
+        min_value=0.0,
+        help="Per SMTP server. 0 = unlimited."
+    )
+    image_workers = st.number_input(
+        "Image Render Processes",
+        value=settings.IMAGE_WORKERS,
+        min_value=1,
+        max_value=64,
+        help="1 renders in the app process."
+    )
+    image_chunk_size = st.number_input(
+        "Image Chunk Size",
+        value=settings.IMAGE_CHUNK_SIZE,
+        min_value=1,
+        max_value=1000,
+        help="Rows sent to a render process at a time."
+    )
+    
     if st.button("Save Configuration"):
         settings.update_config(sender_email, sender_password, smtp_server, smtp_port)
+        settings.update_performance(
+            daily_quota=daily_quota,
+            sender_accounts=extra_accounts,
+            send_workers=send_workers,
+            rate_limit=rate_limit,
+            image_workers=image_workers,
+            image_chunk_size=image_chunk_size,
+            image_format=image_format,
+            image_quality=image_quality,
+            image_max_dimension=image_max_dimension,
+            image_flatten=image_flatten
+        )
         st.success("Configuration saved!")
 
+def make_sender(pool_size):
+    """EmailSender for the sidebar account, or an AccountPool when quotas or extra accounts are set"""
+    if not extra_accounts and not daily_quota:
+        from services.email_sender import EmailSender
+        return EmailSender(
+            sender_email,
+            sender_password,
+            smtp_server,
+            smtp_port,
+            pool_size=pool_size,
+            max_messages_per_connection=settings.MAX_MESSAGES_PER_CONNECTION,
+            rate_limit=rate_limit
+        )
+    
+    primary = {
+        'sender_email': sender_email,
+        'sender_password': sender_password,
+        'smtp_server': smtp_server,
+        'smtp_port': smtp_port,
+        'rate_limit': rate_limit,
+        'daily_quota': daily_quota
+    }
+    from services.account_pool import AccountPool
+    return AccountPool(
+        [primary] + extra_accounts,
+        pool_size=pool_size,
+        max_messages_per_connection=settings.MAX_MESSAGES_PER_CONNECTION,
+        ledger=get_ledger()
+    )
+
 # Main content
-tab1, tab2, tab3, tab4 = st.tabs(["📁 Import Data", "🖼️ Generate Images", "📤 Send Emails", "📊 Scheduled Emails"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["📁 Import Data", "🖼️ Generate Images", "📤 Send Emails", "📊 Scheduled Emails", "⏱️ Metrics"]
+)
 
 # Tab 1: Import Excel File
 with tab1:
     st.header("Import Excel File")
-    st.markdown("Upload an Excel file with columns: **Name**, **Email**, **Date** (format: DD/MM/YYYY)")
+    st.markdown("Upload an Excel, CSV or Parquet file with columns: **Name**, **Email**, **Date** (format: DD/MM/YYYY)")
     
-    uploaded_file = st.file_uploader("Choose an Excel file", type=['xlsx', 'xls'])
+    uploaded_file = st.file_uploader("Choose a recipient file", type=SUPPORTED_TYPES)
     
     if uploaded_file:
         try:
-            df = pd.read_excel(uploaded_file)
+            # Import once per uploaded file, not on every rerun
+            import_key = (uploaded_file.name, uploaded_file.size)
+            if st.session_state.get('import_key') != import_key:
+                with st.spinner("Importing recipients..."):
+                    summary = import_recipients(uploaded_file, uploaded_file.name)
+                    st.session_state.df = load_recipients(summary['path'])
+                    st.session_state.import_summary = summary
+                    st.session_state.import_key = import_key
             
-            # Validate columns
-            required_cols = ['Name', 'Email', 'Date']
-            if all(col in df.columns for col in required_cols):
-                # Convert Date column to datetime
-                df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y', errors='coerce')
-                
-                # Save to data/uploads
-                upload_path = Path("data/uploads") / uploaded_file.name
-                upload_path.parent.mkdir(parents=True, exist_ok=True)
-                df.to_excel(upload_path, index=False)
-                
-                st.session_state.df = df
-                
-                st.success(f"✅ Loaded {len(df)} records successfully!")
-                st.dataframe(df)
-                
-                # Statistics
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Total Recipients", len(df))
-                col2.metric("Unique Dates", df['Date'].nunique())
-                col3.metric("Valid Emails", df['Email'].notna().sum())
-                
-            else:
-                st.error(f"❌ Excel file must contain columns: {', '.join(required_cols)}")
+            summary = st.session_state.import_summary
+            
+            st.success(f"✅ Loaded {summary['rows']} records successfully!")
+            st.dataframe(summary['preview'])
+            if summary['rows'] > len(summary['preview']):
+                st.caption(f"Showing the first {len(summary['preview'])} of {summary['rows']} rows.")
+            
+            # Statistics
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total Recipients", summary['rows'])
+            col2.metric("Unique Dates", summary['unique_dates'])
+            col3.metric("Valid Emails", summary['valid_emails'])
+            
+            if summary['rejected']:
+                with st.expander(f"⚠️ {summary['rejected']} rows rejected"):
+                    st.write(summary['rejected_reasons'])
+                    st.dataframe(summary['rejected_preview'])
+                    st.caption(f"Full report: {summary['rejected_path']}")
         
         except Exception as e:
             st.error(f"❌ Error reading file: {str(e)}")
@@ -101,6 +286,8 @@ with tab2:
     st.header("Generate Personalized Images")
     
     if st.session_state.df is not None:
+        from ui.preview import render_preview, sample_rows, thumbnail
+        
         col1, col2 = st.columns([1, 1])
         
         with col1:
@@ -108,13 +295,25 @@ with tab2:
             template_file = st.file_uploader("Choose template image (PNG/JPEG)", type=['png', 'jpg', 'jpeg'])
             
             if template_file:
-                # Save template
+                # Save template (once per upload, not on every slider change).
+                # Its content digest keys the preview caches, so a new file
+                # with the same name and size is not mistaken for the old one.
                 template_path = Path("assets/templates") / template_file.name
-                template_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(template_path, 'wb') as f:
-                    f.write(template_file.getbuffer())
+                upload = (template_file.name, getattr(template_file, 'file_id', template_file.size))
+                if st.session_state.get('template_upload') != upload or not template_path.exists():
+                    data = template_file.getbuffer()
+                    template_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(template_path, 'wb') as f:
+                        f.write(data)
+                    st.session_state.template_upload = upload
+                    st.session_state.template_digest = hashlib.sha256(data).hexdigest()
+                template_digest = st.session_state.template_digest
                 
-                st.image(template_file, caption="Template Image", width=None)
+                st.image(
+                    thumbnail(str(template_path), template_path.stat().st_mtime),
+                    caption="Template Image",
+                    width=None
+                )
         
         with col2:
             st.subheader("Text Settings")
@@ -125,42 +324,100 @@ with tab2:
             date_x = st.slider("Date X Position", 0, 1000, 100)
             date_y = st.slider("Date Y Position", 0, 1000, 200)
         
+        if template_file:
+            # Remembered so Send Emails can render in memory without saved images
+            st.session_state.render_settings = {
+                'template_path': str(template_path),
+                'font_size': font_size,
+                'color': text_color,
+                'name_pos': (name_x, name_y),
+                'date_pos': (date_x, date_y)
+            }
+            
+            # Low-resolution render of a few rows; full size only on Generate
+            st.subheader("Live Preview")
+            rows = sample_rows(get_plan(send_mode))
+            previews = render_preview(
+                str(template_path),
+                template_digest,
+                rows,
+                font_size,
+                text_color,
+                (name_x, name_y),
+                (date_x, date_y)
+            )
+            cols = st.columns(max(len(previews), 1))
+            for col, (name, _), data in zip(cols, rows, previews):
+                with col:
+                    st.image(data, caption=name, width=None)
+            st.caption("Preview resolution. \"Generate All Images\" renders every row at full size.")
+        
+            with st.expander("📦 Attachment size by format"):
+                # One sample render, encoded every way with the sidebar settings
+                plan = get_plan(send_mode)
+                sample = next(iter(plan), None)
+                report = get_encoding_report(
+                    str(template_path),
+                    template_digest,
+                    sample.name if sample else "Sample Name",
+                    sample.date_text if sample else datetime.now().strftime('%d/%m/%Y'),
+                    {
+                        'font_size': font_size,
+                        'color': text_color,
+                        'name_pos': (name_x, name_y),
+                        'date_pos': (date_x, date_y)
+                    },
+                    image_encoding
+                )
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            'Format': encoding_labels[r['encoding']],
+                            'Size (KB)': round(r['bytes'] / 1024, 1),
+                            'Encode (ms)': round(r['seconds'] * 1000, 1),
+                            f'Campaign upload (MB, {len(plan)} emails)': round(
+                                r['bytes'] * 4 / 3 * len(plan) / 1024 / 1024, 1
+                            )
+                        }
+                        for r in report
+                    ]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+                st.caption("Upload size includes base64 encoding (+33%).")
+                selected = next(r for r in report if r['encoding'] == image_format)
+                st.image(selected['data'], caption=f"{encoding_labels[image_format]} sample")
+        
         if st.button("🎨 Generate All Images", type="primary"):
             if template_file:
+                from services.image_generator import ImageGenerator
+                
                 with st.spinner("Generating images..."):
-                    generator = ImageGenerator(str(template_path))
+                    generator = ImageGenerator(
+                        str(template_path),
+                        cache_max_bytes=settings.IMAGE_CACHE_MAX_MB * 1024 * 1024,
+                        **image_encoding
+                    )
                     
-                    if send_mode == "Combine Days":
-                        # Group by email and combine dates
-                        grouped = st.session_state.df.groupby(['Name', 'Email'])['Date'].apply(list).reset_index()
-                        
-                        for idx, row in grouped.iterrows():
-                            dates_str = ", ".join([d.strftime('%d/%m/%Y') for d in row['Date']])
-                            output_path = generator.generate_image(
-                                row['Name'],
-                                dates_str,
-                                font_size,
-                                text_color,
-                                (name_x, name_y),
-                                (date_x, date_y)
-                            )
-                            st.session_state.generated_images[row['Email']] = output_path
-                    else:
-                        # Generate separate images for each row
-                        for idx, row in st.session_state.df.iterrows():
-                            date_str = row['Date'].strftime('%d/%m/%Y')
-                            output_path = generator.generate_image(
-                                row['Name'],
-                                date_str,
-                                font_size,
-                                text_color,
-                                (name_x, name_y),
-                                (date_x, date_y)
-                            )
-                            key = f"{row['Email']}_{idx}"
-                            st.session_state.generated_images[key] = output_path
+                    st.session_state.generated_images.update(generator.generate_batch(
+                        get_plan(send_mode).render_rows(),
+                        font_size,
+                        text_color,
+                        (name_x, name_y),
+                        (date_x, date_y),
+                        workers=image_workers,
+                        chunk_size=image_chunk_size
+                    ))
                     
                     st.success(f"✅ Generated {len(st.session_state.generated_images)} images!")
+                    
+                    hits = generator.cache_stats['hits']
+                    misses = generator.cache_stats['misses']
+                    if hits + misses:
+                        st.info(
+                            f"♻️ Image cache: {hits} reused, {misses} rendered "
+                            f"({hits / (hits + misses):.0%} hit rate)"
+                        )
             else:
                 st.warning("⚠️ Please upload a template image first.")
         
@@ -168,9 +425,14 @@ with tab2:
         if st.session_state.generated_images:
             st.subheader("Generated Images Preview")
             cols = st.columns(3)
-            for idx, (key, img_path) in enumerate(list(st.session_state.generated_images.items())[:6]):
+            shown = [(key, path) for key, path in st.session_state.generated_images.items() if path][:6]
+            for idx, (key, img_path) in enumerate(shown):
                 with cols[idx % 3]:
-                    st.image(img_path, caption=key, width=None)
+                    try:
+                        st.image(thumbnail(img_path, os.path.getmtime(img_path)), caption=key, width=None)
+                    except OSError:
+                        # Evicted from the image cache, e.g. by another session's run
+                        st.caption(f"{key}: no longer cached, generate again to preview")
     else:
         st.info("👆 Please import an Excel file first in the 'Import Data' tab.")
 
@@ -178,7 +440,7 @@ with tab2:
 with tab3:
     st.header("Send Emails")
     
-    if st.session_state.df is not None and st.session_state.generated_images:
+    if st.session_state.df is not None and (st.session_state.generated_images or st.session_state.render_settings):
         col1, col2 = st.columns([2, 1])
         
         with col1:
@@ -193,81 +455,161 @@ with tab3:
             st.subheader("Schedule Options")
             schedule_type = st.radio("Send Type", ["Send Now", "Schedule"])
             
+            stream_images = st.checkbox(
+                "Render images in memory while sending",
+                value=not st.session_state.generated_images,
+                disabled=schedule_type == "Schedule" or st.session_state.render_settings is None,
+                help="Images are rendered and attached without being saved to disk. "
+                     "Generated images are then only needed for previewing."
+            )
+            
+            # Same data, mode and message -> same ID, so a re-run resumes
+            default_campaign_id = hashlib.sha1(
+                repr((st.session_state.get('import_key'), send_mode, email_subject, email_body)).encode()
+            ).hexdigest()[:12]
+            campaign_id = st.text_input(
+                "Campaign ID",
+                value=default_campaign_id,
+                disabled=schedule_type == "Schedule",
+                help="Recipients already sent under this ID are skipped, so an "
+                     "interrupted campaign can be resumed by sending again."
+            )
+            
             if schedule_type == "Schedule":
                 schedule_date = st.date_input("Schedule Date", datetime.now())
                 schedule_time = st.time_input("Schedule Time", time(9, 0))
         
         if st.button("📤 Send/Schedule Emails", type="primary"):
-            email_sender = EmailSender(sender_email, sender_password, smtp_server, smtp_port)
+            stream = schedule_type == "Send Now" and stream_images and st.session_state.render_settings
+            
+            # Streamed jobs are rendered on the fly; others need a generated image
+            jobs = get_plan(send_mode).jobs(
+                email_subject,
+                email_body,
+                None if stream else st.session_state.generated_images
+            )
             
             if schedule_type == "Send Now":
-                with st.spinner("Sending emails..."):
-                    success_count = 0
-                    
-                    if send_mode == "Combine Days":
-                        grouped = st.session_state.df.groupby(['Name', 'Email']).first().reset_index()
-                        for idx, row in grouped.iterrows():
-                            if row['Email'] in st.session_state.generated_images:
-                                body = email_body.replace('{name}', row['Name'])
-                                if email_sender.send_email(
-                                    row['Email'],
-                                    email_subject,
-                                    body,
-                                    st.session_state.generated_images[row['Email']]
-                                ):
-                                    success_count += 1
+                from services.image_generator import ImageGenerator
+                from services.email_sender import TRANSIENT
+                from services.account_pool import AccountPool
+                from services.retry_queue import RetryQueue
+                from services.pipeline import stream_campaign
+                
+                progress = st.progress(0.0, text="Sending emails...")
+                
+                def update_progress(done, total, result):
+                    progress.progress(done / total, text=f"Sent {done}/{total} - {result['recipient']}")
+                
+                # Kept open after the send when there are retries, so they go
+                # out with the same account assignments and cool-downs
+                email_sender = make_sender(send_workers)
+                try:
+                    if stream:
+                        render_settings = dict(st.session_state.render_settings)
+                        generator = ImageGenerator(render_settings.pop('template_path'), **image_encoding)
+                        results = stream_campaign(
+                            generator,
+                            email_sender,
+                            jobs,
+                            render_settings,
+                            workers=send_workers,
+                            progress_callback=update_progress,
+                            journal=get_journal(),
+                            campaign_id=campaign_id,
+                            render_workers=image_workers
+                        )
                     else:
-                        for idx, row in st.session_state.df.iterrows():
-                            key = f"{row['Email']}_{idx}"
-                            if key in st.session_state.generated_images:
-                                body = email_body.replace('{name}', row['Name'])
-                                if email_sender.send_email(
-                                    row['Email'],
-                                    email_subject,
-                                    body,
-                                    st.session_state.generated_images[key]
-                                ):
-                                    success_count += 1
+                        results = email_sender.send_many(
+                            jobs,
+                            send_workers,
+                            update_progress,
+                            journal=get_journal(),
+                            campaign_id=campaign_id
+                        )
+                except Exception:
+                    email_sender.close()
+                    raise
+                get_journal().flush()
+                
+                success_count = sum(1 for r in results if r['success'] and not r['skipped'])
+                skipped_count = sum(1 for r in results if r['skipped'])
+                st.success(f"✅ Successfully sent {success_count} emails!")
+                if skipped_count:
+                    st.info(f"⏭️ Skipped {skipped_count} emails already sent in campaign {campaign_id}")
+                
+                if isinstance(email_sender, AccountPool):
+                    st.session_state.account_stats = email_sender.stats()
+                    st.subheader("Sender Accounts")
+                    st.dataframe(pd.DataFrame(st.session_state.account_stats), hide_index=True)
+                
+                # Transient failures are retried in the background with backoff
+                retries = [(job, r) for job, r in zip(jobs, results) if r['status'] == TRANSIENT]
+                if retries:
+                    # One retry queue per session: stop the previous campaign's
+                    # thread and connections instead of leaking them
+                    previous = st.session_state.pop('retry_queue', None)
+                    if previous is not None:
+                        previous.close()
                     
-                    st.success(f"✅ Successfully sent {success_count} emails!")
+                    def render_image(job):
+                        # Streamed images were never saved; render on the retry thread
+                        job = dict(job)
+                        job['image_data'], job['image_name'] = generator.render_bytes(
+                            job['name'], job['date'], **render_settings
+                        )
+                        return job
+                    
+                    # The queue owns the campaign's sender and closes it
+                    retry_queue = RetryQueue(
+                        email_sender,
+                        retry_budget=max(10, len(jobs) // 10),
+                        journal=get_journal(),
+                        campaign_id=campaign_id,
+                        prepare=render_image if stream else None
+                    )
+                    for job, result in retries:
+                        retry_queue.submit(job, result)
+                    st.session_state.retry_queue = retry_queue
+                else:
+                    email_sender.close()
+                
+                failed = [r for r in results if not r['success'] and r['status'] != TRANSIENT]
+                if failed:
+                    st.warning(f"⚠️ {len(failed)} emails failed")
+                    st.dataframe(pd.DataFrame(failed))
+            elif not st.session_state.generated_images:
+                st.warning("⚠️ Generate images first; scheduled emails attach the saved images.")
             else:
                 # Schedule emails
                 schedule_datetime = datetime.combine(schedule_date, schedule_time)
                 
-                if send_mode == "Combine Days":
-                    grouped = st.session_state.df.groupby(['Name', 'Email']).first().reset_index()
-                    for idx, row in grouped.iterrows():
-                        if row['Email'] in st.session_state.generated_images:
-                            body = email_body.replace('{name}', row['Name'])
-                            st.session_state.scheduler.schedule_email(
-                                schedule_datetime,
-                                row['Email'],
-                                email_subject,
-                                body,
-                                st.session_state.generated_images[row['Email']],
-                                sender_email,
-                                sender_password,
-                                smtp_server,
-                                smtp_port
-                            )
-                else:
-                    for idx, row in st.session_state.df.iterrows():
-                        key = f"{row['Email']}_{idx}"
-                        if key in st.session_state.generated_images:
-                            body = email_body.replace('{name}', row['Name'])
-                            st.session_state.scheduler.schedule_email(
-                                schedule_datetime,
-                                row['Email'],
-                                email_subject,
-                                body,
-                                st.session_state.generated_images[key],
-                                sender_email,
-                                sender_password,
-                                smtp_server,
-                                smtp_port
-                            )
+                job_ids = st.session_state.scheduler.schedule_emails(
+                    schedule_datetime,
+                    jobs,
+                    sender_email,
+                    sender_password,
+                    smtp_server,
+                    smtp_port
+                )
                 
-                st.success(f"✅ Scheduled emails for {schedule_datetime.strftime('%Y-%m-%d %H:%M')}")
+                st.success(f"✅ Scheduled {len(job_ids)} emails for {schedule_datetime.strftime('%Y-%m-%d %H:%M')}")
+        
+        retry_queue = st.session_state.get('retry_queue')
+        if retry_queue is not None:
+            stats = retry_queue.stats
+            if retry_queue.pending():
+                st.info(
+                    f"🔁 Retrying {retry_queue.pending()} emails after temporary errors "
+                    f"({stats['sent']} sent, {stats['failed']} failed so far)"
+                )
+                if st.button("🔄 Refresh retry status"):
+                    st.rerun()
+            else:
+                # Done: release its thread and SMTP connections
+                retry_queue.close()
+                del st.session_state.retry_queue
+                st.info(f"🔁 Retries finished: {stats['sent']} sent, {stats['failed']} failed")
     else:
         st.info("👆 Please import data and generate images first.")
 
@@ -275,10 +617,17 @@ with tab3:
 with tab4:
     st.header("Scheduled Emails")
     
-    scheduled = st.session_state.scheduler.get_scheduled_emails()
+    total_scheduled = st.session_state.scheduler.count_scheduled()
     
-    if scheduled:
-        st.write(f"Total scheduled: {len(scheduled)}")
+    if total_scheduled:
+        st.write(f"Total scheduled: {total_scheduled}")
+        
+        # One expander and button per email is slow for large campaigns
+        pages = (total_scheduled - 1) // SCHEDULED_PAGE_SIZE + 1
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        scheduled = st.session_state.scheduler.get_scheduled_emails(
+            (page - 1) * SCHEDULED_PAGE_SIZE, SCHEDULED_PAGE_SIZE
+        )
         
         for job in scheduled:
             with st.expander(f"📅 {job['time']} - {job['recipient']}"):
@@ -290,4 +639,81 @@ with tab4:
                     st.success("Email cancelled!")
                     st.rerun()
     else:
-        st.info("No scheduled emails.")
\ No newline at end of file
+        st.info("No scheduled emails.")
+
+# Tab 5: Metrics
+with tab5:
+    st.header("Campaign Metrics")
+    
+    snapshot = metrics.snapshot()
+    counters = snapshot['counters']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Emails Sent", counters.get('emails_sent', 0))
+    col2.metric("Transient Failures", counters.get('emails_transient', 0))
+    col3.metric("Permanent Failures", counters.get('emails_permanent', 0))
+    col4.metric("Image Cache Hits", counters.get('image_cache_hits', 0))
+    
+    if snapshot['timings']:
+        # Stages in pipeline order, milliseconds for readability
+        order = [stage for stage in STAGES if stage in snapshot['timings']]
+        order += sorted(set(snapshot['timings']) - set(order))
+        timings = pd.DataFrame(
+            [
+                {
+                    'Stage': stage,
+                    'Count': t['count'],
+                    'Total (s)': round(t['total'], 2),
+                    'Mean (ms)': round(t['mean'] * 1000, 1),
+                    'p50 (ms)': round(t['p50'] * 1000, 1),
+                    'p95 (ms)': round(t['p95'] * 1000, 1),
+                    'p99 (ms)': round(t['p99'] * 1000, 1),
+                    'Max (ms)': round(t['max'] * 1000, 1)
+                }
+                for stage, t in ((stage, snapshot['timings'][stage]) for stage in order)
+            ]
+        )
+        st.subheader("Time per Stage")
+        st.dataframe(timings, hide_index=True, use_container_width=True)
+        st.bar_chart(timings.set_index('Stage')['Total (s)'])
+    else:
+        st.info("No activity yet. Import, generate or send to collect timings.")
+    
+    if snapshot['errors']:
+        st.subheader("Errors")
+        st.dataframe(pd.DataFrame(snapshot['errors']), hide_index=True)
+    
+    st.subheader("Sender Accounts Today")
+    ledger = get_ledger()
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'Account': account,
+                'Sent Today': ledger.sent_today(account),
+                'Daily Quota': quota or "unlimited"
+            }
+            for account, quota in [(sender_email, daily_quota)] + [
+                (a['sender_email'], a.get('daily_quota')) for a in extra_accounts
+            ]
+        ]),
+        hide_index=True
+    )
+    if st.session_state.get('account_stats'):
+        st.caption("Last campaign")
+        st.dataframe(pd.DataFrame(st.session_state.account_stats), hide_index=True)
+    
+    with st.expander("All counters"):
+        st.json(counters)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        if st.button("🔄 Refresh"):
+            st.rerun()
+    with col2:
+        if st.button("🗑️ Reset"):
+            metrics.reset()
+            st.rerun()
+    with col3:
+        st.download_button("⬇️ JSON", metrics.to_json(), file_name="smartmailer_metrics.json", mime="application/json")
+    with col4:
+        st.download_button("⬇️ Prometheus", metrics.to_prometheus(), file_name="smartmailer_metrics.prom", mime="text/plain")
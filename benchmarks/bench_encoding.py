@@ -0,0 +1,62 @@
+"""
+Bytes on the wire and seconds per message for each attachment encoding
+
+Each message is rendered, encoded, built as MIME and serialized, i.e.
+everything stream_campaign does before handing it to SMTP.
+
+Usage:
+    python -m benchmarks.bench_encoding --size 1920x1080 --messages 50 --quality 85
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from benchmarks.bench_render import SETTINGS, parse_size
+from benchmarks.common import make_template
+from services.email_sender import EmailSender
+from services.image_generator import ENCODINGS, ImageGenerator
+
+
+def run(size, messages, quality=85, max_dimension=None):
+    sender = EmailSender('bench@example.com', '', '127.0.0.1', 8025, use_tls=False)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A photo-like gradient so lossy and palette encodings have real work to do
+        template = make_template(Path(tmp) / 'template.png', size)
+        gradient = Image.linear_gradient('L').resize(size).convert('RGB')
+        Image.blend(Image.open(template).convert('RGB'), gradient, 0.5).save(template)
+
+        for encoding in ENCODINGS:
+            generator = ImageGenerator(template, encoding=encoding, quality=quality, max_dimension=max_dimension)
+            generator._get_template()
+            total_bytes = 0
+            start = time.perf_counter()
+            for i in range(messages):
+                data, name = generator.render_bytes(f'Person {i}', '01/01/2026', **SETTINGS)
+                msg = sender.build_message(f'user{i}@example.com', 'Benchmark', 'Hello', image_data=data, image_name=name)
+                total_bytes += len(msg.as_bytes())
+            elapsed = time.perf_counter() - start
+
+            results[f'encoding/{encoding}'] = {
+                'bytes_per_message': total_bytes / messages,
+                'seconds_per_message': elapsed / messages
+            }
+            print(f"{encoding:>5}: {total_bytes / messages / 1024:9.1f} KB/message "
+                  f"{elapsed / messages * 1000:8.1f} ms/message")
+
+    sender.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=parse_size, default=(1920, 1080))
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--quality', type=int, default=85)
+    parser.add_argument('--max-dimension', type=int)
+    args = parser.parse_args()
+    run(args.size, args.messages, args.quality, args.max_dimension)
@@ -0,0 +1,56 @@
+"""
+Import synthetic recipient lists (xlsx and csv) into Parquet
+
+Usage:
+    python -m benchmarks.bench_import --rows 10000 100000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_validation import make_frame
+from services.excel_service import import_recipients
+
+
+def write_source(df, path):
+    """Write the frame in the format implied by the file suffix"""
+    out = df.assign(Date=df['Date'].dt.strftime('%d/%m/%Y'))
+    if path.suffix == '.csv':
+        out.to_csv(path, index=False)
+    else:
+        out.to_excel(path, index=False)
+
+
+def run(row_counts, formats=('xlsx', 'csv')):
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in row_counts:
+            df = make_frame(rows)
+            for fmt in formats:
+                source = Path(tmp) / f'recipients_{rows}.{fmt}'
+                write_source(df, source)
+
+                start = time.perf_counter()
+                summary = import_recipients(str(source), source.name, output_dir=str(Path(tmp) / 'processed'))
+                elapsed = time.perf_counter() - start
+
+                results[f'import/{fmt}/{rows}'] = {
+                    'seconds': elapsed,
+                    'rows_per_second': rows / elapsed,
+                    'clean': summary['rows'],
+                    'rejected': summary['rejected']
+                }
+                print(f"import {fmt:>4} {rows:>8,} rows: {elapsed:6.2f}s ({rows / elapsed:,.0f} rows/s, "
+                      f"{summary['rejected']:,} rejected)")
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', nargs='+', type=int, default=[10000, 100000])
+    parser.add_argument('--formats', nargs='+', default=['xlsx', 'csv'])
+    args = parser.parse_args()
+    run(args.rows, args.formats)
@@ -0,0 +1,71 @@
+"""
+Build and serialize MIME messages with and without an image attachment
+
+Each case runs with the shared-part caches of MessageFactory and again
+with them disabled, so the saving from reusing encoded parts is visible.
+
+Usage:
+    python -m benchmarks.bench_mime --messages 1000
+"""
+import argparse
+from io import BytesIO
+
+from PIL import Image
+
+from benchmarks.common import measure
+from services.email_sender import EmailSender
+from services.message_factory import MessageFactory
+
+BODY = "Dear {name},\n\nPlease find your personalized image attached.\n\nBest regards"
+
+
+def make_png(size=(1920, 1080)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (235, 240, 250)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def run(messages, repeat=3):
+    # No connection is opened until a message is sent
+    sender = EmailSender('bench@example.com', '', '127.0.0.1', 8025, use_tls=False)
+    image = make_png()
+    results = {}
+
+    cases = {
+        'text': ({}, True),
+        'image': ({'image_data': image, 'image_name': 'card.png'}, True),
+        # Same body and image for everyone, e.g. an unpersonalized card
+        'shared': ({'image_data': image, 'image_name': 'card.png'}, False),
+    }
+    factories = {
+        'cached': MessageFactory(sender.sender_email),
+        'uncached': MessageFactory(sender.sender_email, 0, 0),
+    }
+    for label, (attachment, personalized) in cases.items():
+        for mode, factory in factories.items():
+            sender.messages = factory
+
+            def build():
+                for i in range(messages):
+                    body = BODY.replace('{name}', f'Person {i}' if personalized else 'Customer')
+                    msg = sender.build_message(
+                        f'user{i}@example.com', 'Your Personalized Image', body, **attachment
+                    )
+                    msg.as_bytes()
+
+            timing = measure(build, repeat)
+            timing['messages_per_second'] = messages / timing['best']
+            results[f'build_message/{label}/{mode}'] = timing
+            print(f"build_message {label:>6} {mode:>8}: {timing['best'] / messages * 1e6:8.1f} us/message "
+                  f"({timing['messages_per_second']:,.0f} messages/s)")
+
+    sender.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.messages, args.repeat)
@@ -0,0 +1,83 @@
+"""
+Render personalized images at several template and batch sizes
+
+The image cache is pointed at a temporary directory and every row has a
+unique name, so each image is rendered and encoded (no cache hits).
+
+Usage:
+    python -m benchmarks.bench_render --sizes 800x600 1920x1080 --batches 10 100
+"""
+import argparse
+import itertools
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import make_template, measure
+from services.image_cache import ImageCache
+from services.image_generator import ImageGenerator
+
+SETTINGS = {'font_size': 40, 'color': '#1a1a1a', 'name_pos': (100, 100), 'date_pos': (100, 200)}
+
+
+def make_generator(template, cache_dir):
+    generator = ImageGenerator(template)
+    generator.output_dir = Path(cache_dir)
+    generator.cache = ImageCache(cache_dir, 1024 ** 3)
+    return generator
+
+
+def run(sizes, batches, workers=1, repeat=3):
+    results = {}
+    counter = itertools.count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for width, height in sizes:
+            template = make_template(Path(tmp) / f'template_{width}x{height}.png', (width, height))
+            generator = make_generator(template, Path(tmp) / 'cache')
+            label = f'{width}x{height}'
+
+            # Single image: render + PNG encode + write
+            timing = measure(
+                lambda: generator.generate_image(f'Person {next(counter)}', '01/01/2026', **SETTINGS),
+                repeat
+            )
+            results[f'generate_image/{label}'] = timing
+            print(f"generate_image {label:>10}: {timing['best'] * 1000:8.1f} ms")
+
+            timing = measure(
+                lambda: generator.render_bytes(f'Person {next(counter)}', '01/01/2026', **SETTINGS),
+                repeat
+            )
+            results[f'render_bytes/{label}'] = timing
+            print(f"render_bytes   {label:>10}: {timing['best'] * 1000:8.1f} ms")
+
+            for batch in batches:
+                def generate():
+                    rows = [
+                        (f'user{i}@example.com', f'Person {next(counter)}', '01/01/2026')
+                        for i in range(batch)
+                    ]
+                    generator.generate_batch(rows, workers=workers, **SETTINGS)
+
+                timing = measure(generate, repeat)
+                timing['images_per_second'] = batch / timing['best']
+                results[f'generate_batch/{label}/{batch}'] = timing
+                print(f"generate_batch {label:>10} x{batch:<5}: {timing['best']:7.2f} s "
+                      f"({timing['images_per_second']:,.0f} images/s, {workers} workers)")
+
+    return results
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[(800, 600), (1920, 1080), (3508, 2480)])
+    parser.add_argument('--batches', nargs='+', type=int, default=[10, 100])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.batches, args.workers, args.repeat)
@@ -0,0 +1,96 @@
+"""
+Schedule, cancel and fire many jobs with EmailScheduler
+
+Sending is replaced by a counter so only the scheduler engine (heap,
+SQLite store, dispatch loop) is measured.
+
+Usage:
+    python -m benchmarks.bench_scheduler --jobs 100000
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from services.scheduler import EmailScheduler
+
+
+class CountingScheduler(EmailScheduler):
+    def __init__(self, db_path):
+        self.fired = 0
+        super().__init__(db_path)
+
+    def _dispatch(self, jobs):
+        self.fired += len(jobs)
+        for job in jobs:
+            job['status'] = 'Sent'
+
+
+def run(count, cancel_every):
+    jobs = [
+        {'recipient': f'user{i}@example.com', 'subject': 'Benchmark', 'body': 'Hello', 'image_path': None}
+        for i in range(count)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'scheduler.db')
+        scheduler = CountingScheduler(db_path)
+
+        start = time.perf_counter()
+        job_ids = scheduler.schedule_emails(
+            datetime.now() + timedelta(hours=1), jobs, 'bench@example.com', '', 'localhost', 25
+        )
+        insert = time.perf_counter() - start
+
+        start = time.perf_counter()
+        to_cancel = job_ids[::cancel_every]
+        for job_id in to_cancel:
+            scheduler.cancel_email(job_id)
+        cancel = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for job_id in job_ids[:1000]:
+            scheduler.get_status(job_id)
+        status = time.perf_counter() - start
+        scheduler.stop_scheduler()
+
+        # A fresh scheduler on the same database reloads pending jobs
+        start = time.perf_counter()
+        reloaded = CountingScheduler(db_path)
+        reload = time.perf_counter() - start
+        pending = reloaded.count_scheduled()
+        reloaded.stop_scheduler()
+
+        # Jobs that are already due fire as fast as the loop can pop them
+        scheduler = CountingScheduler(str(Path(tmp) / 'fire.db'))
+        start = time.perf_counter()
+        scheduler.schedule_emails(datetime.now(), jobs, 'bench@example.com', '', 'localhost', 25)
+        while scheduler.fired < count:
+            time.sleep(0.01)
+        fire = time.perf_counter() - start
+        scheduler.stop_scheduler()
+
+    print(f"schedule {count} jobs:  {insert:.2f}s ({count / insert:,.0f} jobs/s)")
+    print(f"cancel {len(to_cancel)} jobs:   {cancel:.2f}s")
+    print(f"status x1000:         {status * 1000:.1f}ms")
+    print(f"restart reload:       {reload:.2f}s ({pending} pending)")
+    print(f"schedule+fire {count}: {fire:.2f}s")
+    return {
+        f'scheduler/{count}': {
+            'schedule_seconds': insert,
+            'cancel_seconds': cancel,
+            'cancelled': len(to_cancel),
+            'status_x1000_seconds': status,
+            'reload_seconds': reload,
+            'fire_seconds': fire
+        }
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--cancel-every', type=int, default=10)
+    args = parser.parse_args()
+    run(args.jobs, args.cancel_every)
@@ -0,0 +1,85 @@
+"""
+Compare serial send_email against send_many on a local SMTP sink, and
+measure end-to-end render + send throughput with stream_campaign
+
+Usage:
+    python -m benchmarks.bench_send --messages 500 --workers 8 --latency 0.02
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import make_template
+from benchmarks.smtp_sink import start_sink
+from services.email_sender import EmailSender
+from services.image_generator import ImageGenerator
+from services.pipeline import stream_campaign
+
+
+def make_jobs(count):
+    return [
+        {
+            'recipient': f'user{i}@example.com',
+            'subject': 'Benchmark',
+            'body': f'Dear User {i},\n\nBenchmark message.',
+            'name': f'User {i}',
+            'date': '01/01/2026'
+        }
+        for i in range(count)
+    ]
+
+
+def run(messages, workers, latency, port):
+    controller, handler = start_sink(latency, port)
+    jobs = make_jobs(messages)
+    try:
+        with EmailSender('bench@example.com', '', '127.0.0.1', port, use_tls=False) as sender:
+            start = time.perf_counter()
+            for job in jobs:
+                sender.send_email(job['recipient'], job['subject'], job['body'])
+            serial = time.perf_counter() - start
+
+        with EmailSender('bench@example.com', '', '127.0.0.1', port,
+                         pool_size=workers, use_tls=False) as sender:
+            start = time.perf_counter()
+            results = sender.send_many(jobs, workers)
+            parallel = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp, EmailSender(
+            'bench@example.com', '', '127.0.0.1', port, pool_size=workers, use_tls=False
+        ) as sender:
+            generator = ImageGenerator(make_template(Path(tmp) / 'template.png', (1200, 800)))
+            settings = {'font_size': 40, 'color': '#000000', 'name_pos': (100, 100), 'date_pos': (100, 200)}
+            start = time.perf_counter()
+            streamed = stream_campaign(generator, sender, jobs, settings, workers=workers)
+            end_to_end = time.perf_counter() - start
+    finally:
+        controller.stop()
+
+    sent = sum(1 for r in results if r['success'])
+    print(f"serial:    {messages / serial:8.1f} msg/s ({serial:.2f}s)")
+    print(f"send_many: {messages / parallel:8.1f} msg/s ({parallel:.2f}s, {workers} workers, {sent} sent)")
+    print(f"speedup:   {serial / parallel:.1f}x")
+    print(f"render+send: {messages / end_to_end:6.1f} msg/s ({end_to_end:.2f}s, "
+          f"{sum(1 for r in streamed if r['success'])} sent with images)")
+    return {
+        f'send/{messages}': {
+            'latency': latency,
+            'workers': workers,
+            'serial_messages_per_second': messages / serial,
+            'send_many_messages_per_second': messages / parallel,
+            'end_to_end_messages_per_second': messages / end_to_end,
+            'sent': sent
+        }
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.02, help='Injected seconds per message')
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+    run(args.messages, args.workers, args.latency, args.port)
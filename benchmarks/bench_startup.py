@@ -0,0 +1,114 @@
+"""
+Time app.py cold start and reruns with Streamlit's AppTest
+
+Each run starts a fresh Python process in an empty working directory, so
+module imports, config loading and service construction are all paid on
+the first render, as after `streamlit run app.py`. Later runs in the same
+process are reruns: unchanged reruns and a sidebar interaction (switching
+the send mode).
+
+Usage:
+    python -m benchmarks.bench_startup --reruns 20 --repeat 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child process; prints one JSON line of timings
+CHILD = r'''
+import json, sys, time
+
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_import = time.perf_counter() - start
+
+def timed(at):
+    # AppTest looks selectbox values up among the format_func labels, so
+    # re-select each box by its label before running again
+    for box in at.selectbox:
+        box.set_value(box.options[box.proto.default])
+    start = time.perf_counter()
+    at.run()
+    if at.exception:
+        raise SystemExit(at.exception[0].message)
+    return time.perf_counter() - start
+
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+first = timed(at)
+modules = sorted(sys.modules)
+
+reruns = [timed(at) for _ in range(int(sys.argv[2]))]
+interactions = []
+for i in range(int(sys.argv[2])):
+    at.sidebar.radio[0].set_value("Separate Days" if i % 2 == 0 else "Combine Days")
+    interactions.append(timed(at))
+
+print(json.dumps({
+    'streamlit_import': streamlit_import,
+    'first_render': first,
+    'modules': len(modules),
+    'pil_loaded': 'PIL.Image' in modules,
+    'smtplib_loaded': 'smtplib' in modules,
+    'reruns': reruns,
+    'interactions': interactions
+}))
+'''
+
+
+def run_child(reruns):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        proc = subprocess.run(
+            [sys.executable, '-c', CHILD, str(ROOT / 'app.py'), str(reruns)],
+            cwd=tmp, env=env, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"app.py failed under AppTest:\n{proc.stderr or proc.stdout}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    runs = sorted(runs)
+    return {
+        'mean': statistics.mean(runs),
+        'p50': runs[len(runs) // 2],
+        'p95': runs[min(len(runs) - 1, int(len(runs) * 0.95))]
+    }
+
+
+def run(reruns=20, repeat=3):
+    children = [run_child(reruns) for _ in range(repeat)]
+    first = [c['first_render'] for c in children]
+
+    results = {
+        'cold_start': {'best': min(first), 'mean': statistics.mean(first), 'runs': first},
+        'streamlit_import': {'best': min(c['streamlit_import'] for c in children)},
+        'rerun': summarize([t for c in children for t in c['reruns']]),
+        'interaction': summarize([t for c in children for t in c['interactions']]),
+        'modules_after_first_render': children[0]['modules']
+    }
+
+    print(f"streamlit import: {results['streamlit_import']['best'] * 1000:7.1f} ms")
+    print(f"first render:     {results['cold_start']['best'] * 1000:7.1f} ms best, "
+          f"{results['cold_start']['mean'] * 1000:.1f} ms mean "
+          f"({children[0]['modules']} modules; PIL {'loaded' if children[0]['pil_loaded'] else 'not loaded'}, "
+          f"smtplib {'loaded' if children[0]['smtplib_loaded'] else 'not loaded'})")
+    for label in ('rerun', 'interaction'):
+        r = results[label]
+        print(f"{label + ':':<17} {r['mean'] * 1000:7.1f} ms mean, {r['p95'] * 1000:.1f} ms p95")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reruns', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.reruns, args.repeat)
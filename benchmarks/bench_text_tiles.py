@@ -0,0 +1,62 @@
+"""
+Render a Separate Days style list with and without the text tile cache
+
+Rows repeat a few hundred dates and a few thousand names, as in a real
+campaign. Only render() is timed (no encoding or disk writes).
+
+Usage:
+    python -m benchmarks.bench_text_tiles --rows 50000 --dates 300 --names 5000
+"""
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from benchmarks.common import make_template
+from services.image_generator import ImageGenerator
+
+SETTINGS = {'font_size': 48, 'color': '#1a1a1a', 'name_pos': (120, 140), 'date_pos': (120, 240)}
+
+
+def make_rows(rows, dates, names):
+    day = date(2026, 1, 1)
+    date_texts = [(day + timedelta(days=i)).strftime('%d/%m/%Y') for i in range(dates)]
+    return [(f'Person {i % names}', date_texts[i % dates]) for i in range(rows)]
+
+
+def run(rows, dates=300, names=5000, size=(1200, 800)):
+    results = {}
+    data = make_rows(rows, dates, names)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = make_template(Path(tmp) / 'template.png', size)
+        for label, cache_bytes in (('direct', 0), ('tiles', 64 * 1024 * 1024)):
+            generator = ImageGenerator(template, text_cache_bytes=cache_bytes)
+            generator._get_template()
+
+            start = time.perf_counter()
+            for name, date_text in data:
+                generator.render(name, date_text, **SETTINGS)
+            elapsed = time.perf_counter() - start
+
+            results[f'render/{label}/{rows}'] = {
+                'seconds': elapsed,
+                'images_per_second': rows / elapsed
+            }
+            tiles = generator.text_tiles
+            extra = f", {tiles.misses:,} rasterized, {tiles.hits:,} reused" if tiles else ""
+            print(f"{label:>6}: {elapsed:7.2f}s ({rows / elapsed:,.0f} images/s{extra})")
+
+    speedup = results[f'render/direct/{rows}']['seconds'] / results[f'render/tiles/{rows}']['seconds']
+    print(f"speedup: {speedup:.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--dates', type=int, default=300)
+    parser.add_argument('--names', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.rows, args.dates, args.names)
@@ -0,0 +1,43 @@
+"""
+Validate and de-duplicate a synthetic recipient list
+
+Usage:
+    python -m benchmarks.bench_validation --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.validators import validate_recipients
+
+
+def make_frame(rows, seed=0):
+    """Recipients with ~0.1% bad emails, ~0.1% missing dates and some duplicates"""
+    rng = np.random.default_rng(seed)
+    emails = pd.Series([f' User{i % (rows * 9 // 10)}@Example.com ' for i in range(rows)], dtype=object)
+    emails[::1000] = 'not-an-email'
+    dates = pd.Series(pd.to_datetime(rng.integers(0, 365, rows), unit='D', origin='2024-01-01'))
+    dates[::997] = pd.NaT
+    return pd.DataFrame({'Name': [f'Person {i}' for i in range(rows)], 'Email': emails, 'Date': dates})
+
+
+def run(rows):
+    df = make_frame(rows)
+
+    start = time.perf_counter()
+    clean, rejected = validate_recipients(df, set())
+    elapsed = time.perf_counter() - start
+
+    print(f"validated {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"clean: {len(clean):,}  rejected: {len(rejected):,}")
+    print(rejected['Reason'].value_counts().to_string())
+    return {f'validate/{rows}': {'seconds': elapsed, 'rows_per_second': rows / elapsed}}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+    run(args.rows)
@@ -0,0 +1,26 @@
+"""Shared helpers for the benchmark scripts"""
+import statistics
+import time
+
+
+def measure(fn, repeat=3):
+    """
+    Time fn() several times
+
+    Returns:
+        Dict with 'best', 'mean' and 'runs' (seconds)
+    """
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {'best': min(runs), 'mean': statistics.mean(runs), 'runs': runs}
+
+
+def make_template(path, size, color=(235, 240, 250)):
+    """Write a plain PNG template of the given (width, height)"""
+    from PIL import Image
+
+    Image.new('RGB', size, color).save(path, 'PNG')
+    return str(path)
@@ -0,0 +1,140 @@
+"""
+Run the benchmark suite and save the results as JSON
+
+Usage:
+    python -m benchmarks.run_all                      # full sizes
+    python -m benchmarks.run_all --quick              # small sizes, for a smoke run
+    python -m benchmarks.run_all --only render mime
+    python -m benchmarks.run_all --compare benchmarks/results/<earlier>.json
+
+Results are written to benchmarks/results/<timestamp>.json together with the
+Python version, platform, CPU count and git commit, so two runs can be
+compared with --compare (prints new/old ratios for every timing).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# suite -> (full arguments, quick arguments)
+SUITES = {
+    'render': (
+        {'sizes': [(800, 600), (1920, 1080), (3508, 2480)], 'batches': [10, 100]},
+        {'sizes': [(800, 600)], 'batches': [10], 'repeat': 1}
+    ),
+    'text_tiles': ({'rows': 50000}, {'rows': 2000, 'dates': 50, 'names': 500}),
+    'mime': ({'messages': 1000}, {'messages': 100, 'repeat': 1}),
+    'encoding': ({'size': (1920, 1080), 'messages': 50}, {'size': (800, 600), 'messages': 5}),
+    'import': ({'row_counts': [10000, 100000]}, {'row_counts': [1000]}),
+    'validation': ({'rows': 1000000}, {'rows': 10000}),
+    'scheduler': ({'count': 100000, 'cancel_every': 10}, {'count': 2000, 'cancel_every': 10}),
+    'startup': ({'reruns': 20, 'repeat': 3}, {'reruns': 5, 'repeat': 1}),
+    'send': (
+        {'messages': 500, 'workers': 8, 'latency': 0.02, 'port': 8025},
+        {'messages': 50, 'workers': 4, 'latency': 0.01, 'port': 8025}
+    ),
+}
+
+
+def load_suite(name):
+    """Import a suite lazily so a missing optional dependency only skips it"""
+    if name == 'render':
+        from benchmarks import bench_render as module
+    elif name == 'text_tiles':
+        from benchmarks import bench_text_tiles as module
+    elif name == 'mime':
+        from benchmarks import bench_mime as module
+    elif name == 'encoding':
+        from benchmarks import bench_encoding as module
+    elif name == 'import':
+        from benchmarks import bench_import as module
+    elif name == 'validation':
+        from benchmarks import bench_validation as module
+    elif name == 'scheduler':
+        from benchmarks import bench_scheduler as module
+    elif name == 'startup':
+        from benchmarks import bench_startup as module
+    else:
+        from benchmarks import bench_send as module
+    return module.run
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit
+    }
+
+
+def flatten(results, prefix=''):
+    """Yield (name, value) for every numeric leaf"""
+    for key, value in results.items():
+        name = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(current, previous_path):
+    with open(previous_path, 'r') as f:
+        previous = dict(flatten(json.load(f)['results']))
+
+    print(f"\nCompared with {previous_path} (new / old):")
+    for name, value in flatten(current):
+        old = previous.get(name)
+        if old:
+            print(f"  {name:<70} {value / old:6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=list(SUITES), help="Suites to run (default: all)")
+    parser.add_argument('--quick', action='store_true', help="Small sizes for a fast smoke run")
+    parser.add_argument('--output', help="JSON file to write (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or SUITES:
+        full, quick = SUITES[name]
+        print(f"\n== {name} ==")
+        try:
+            run = load_suite(name)
+        except ImportError as e:
+            print(f"skipped ({e})")
+            continue
+        results[name] = run(**(quick if args.quick else full))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'quick': args.quick,
+            'environment': environment(),
+            'results': results
+        }, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Local SMTP stand-in for benchmarks (requires aiosmtpd)"""
+import asyncio
+
+from aiosmtpd.controller import Controller
+
+
+class LatencySink:
+    """aiosmtpd handler that accepts every message after an injected delay"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.count = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.count += 1
+        return '250 Message accepted for delivery'
+
+
+def start_sink(latency=0.0, port=8025):
+    """Start a local SMTP sink and return (controller, handler)"""
+    handler = LatencySink(latency)
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    return controller, handler
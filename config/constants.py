@@ -0,0 +1,26 @@
+import os
+
+# Default tuning values for sending
+DEFAULT_SEND_WORKERS = 4
+DEFAULT_RATE_LIMIT = 5  # messages/sec per SMTP server, 0 = unlimited
+DEFAULT_MAX_MESSAGES_PER_CONNECTION = 100
+DEFAULT_DAILY_QUOTA = 0  # messages/day per sender account, 0 = unlimited
+
+# Default tuning values for image generation
+DEFAULT_IMAGE_WORKERS = os.cpu_count() or 1
+DEFAULT_IMAGE_CHUNK_SIZE = 32
+DEFAULT_IMAGE_CACHE_MAX_MB = 1024
+
+# Attachment encodings offered in the app, in menu order; the same keys as
+# services.image_generator.ENCODINGS (listed here so the sidebar can be
+# drawn without importing PIL)
+IMAGE_ENCODINGS = ['png', 'png8', 'jpeg', 'webp']
+
+# Default attachment encoding (see ImageGenerator)
+DEFAULT_IMAGE_FORMAT = 'png'
+DEFAULT_IMAGE_QUALITY = 85
+DEFAULT_IMAGE_MAX_DIMENSION = 0  # 0 = keep template resolution
+DEFAULT_IMAGE_FLATTEN = False
+
+# Scheduled emails listed per page in the app's Scheduled Emails tab
+SCHEDULED_PAGE_SIZE = 50
@@ -1,23 +1,65 @@
 import json
+import threading
 from pathlib import Path
 
+from config.constants import (
+    DEFAULT_SEND_WORKERS,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_MAX_MESSAGES_PER_CONNECTION,
+    DEFAULT_DAILY_QUOTA,
+    DEFAULT_IMAGE_WORKERS,
+    DEFAULT_IMAGE_CHUNK_SIZE,
+    DEFAULT_IMAGE_CACHE_MAX_MB,
+    DEFAULT_IMAGE_FORMAT,
+    DEFAULT_IMAGE_QUALITY,
+    DEFAULT_IMAGE_MAX_DIMENSION,
+    DEFAULT_IMAGE_FLATTEN
+)
+
 class Settings:
     def __init__(self):
         self.config_file = Path("config/config.json")
-        self.config_file.parent.mkdir(parents=True, exist_ok=True)
-        
+        self.config_mtime = None
+
         # Default settings
         self.SENDER_EMAIL = ""
         self.SENDER_PASSWORD = ""
         self.SMTP_SERVER = "smtp.gmail.com"
         self.SMTP_PORT = 587
-        
+        self.DAILY_QUOTA = DEFAULT_DAILY_QUOTA
+
+        # Extra sender accounts / relays used alongside the one above; dicts
+        # with sender_email, sender_password, smtp_server, smtp_port,
+        # rate_limit and daily_quota
+        self.SENDER_ACCOUNTS = []
+
+        # Performance settings
+        self.SEND_WORKERS = DEFAULT_SEND_WORKERS
+        self.RATE_LIMIT = DEFAULT_RATE_LIMIT
+        self.MAX_MESSAGES_PER_CONNECTION = DEFAULT_MAX_MESSAGES_PER_CONNECTION
+        self.IMAGE_WORKERS = DEFAULT_IMAGE_WORKERS
+        self.IMAGE_CHUNK_SIZE = DEFAULT_IMAGE_CHUNK_SIZE
+        self.IMAGE_CACHE_MAX_MB = DEFAULT_IMAGE_CACHE_MAX_MB
+
+        # Attachment encoding
+        self.IMAGE_FORMAT = DEFAULT_IMAGE_FORMAT
+        self.IMAGE_QUALITY = DEFAULT_IMAGE_QUALITY
+        self.IMAGE_MAX_DIMENSION = DEFAULT_IMAGE_MAX_DIMENSION
+        self.IMAGE_FLATTEN = DEFAULT_IMAGE_FLATTEN
+
         # Load existing config if available
         self.load_config()
-    
+
+    def _file_mtime(self):
+        try:
+            return self.config_file.stat().st_mtime_ns
+        except OSError:
+            return None
+
     def load_config(self):
         """Load configuration from file"""
-        if self.config_file.exists():
+        self.config_mtime = self._file_mtime()
+        if self.config_mtime is not None:
             try:
                 with open(self.config_file, 'r') as f:
                     config = json.load(f)
@@ -25,22 +67,107 @@ class Settings:
                     self.SENDER_PASSWORD = config.get('sender_password', '')
                     self.SMTP_SERVER = config.get('smtp_server', 'smtp.gmail.com')
                     self.SMTP_PORT = config.get('smtp_port', 587)
+                    self.DAILY_QUOTA = config.get('daily_quota', DEFAULT_DAILY_QUOTA)
+                    self.SENDER_ACCOUNTS = config.get('sender_accounts', [])
+                    self.SEND_WORKERS = config.get('send_workers', DEFAULT_SEND_WORKERS)
+                    self.RATE_LIMIT = config.get('rate_limit', DEFAULT_RATE_LIMIT)
+                    self.MAX_MESSAGES_PER_CONNECTION = config.get(
+                        'max_messages_per_connection', DEFAULT_MAX_MESSAGES_PER_CONNECTION
+                    )
+                    self.IMAGE_WORKERS = config.get('image_workers', DEFAULT_IMAGE_WORKERS)
+                    self.IMAGE_CHUNK_SIZE = config.get('image_chunk_size', DEFAULT_IMAGE_CHUNK_SIZE)
+                    self.IMAGE_CACHE_MAX_MB = config.get('image_cache_max_mb', DEFAULT_IMAGE_CACHE_MAX_MB)
+                    self.IMAGE_FORMAT = config.get('image_format', DEFAULT_IMAGE_FORMAT)
+                    self.IMAGE_QUALITY = config.get('image_quality', DEFAULT_IMAGE_QUALITY)
+                    self.IMAGE_MAX_DIMENSION = config.get('image_max_dimension', DEFAULT_IMAGE_MAX_DIMENSION)
+                    self.IMAGE_FLATTEN = config.get('image_flatten', DEFAULT_IMAGE_FLATTEN)
             except Exception as e:
                 print(f"Error loading config: {str(e)}")
-    
+
+    def reload_if_changed(self):
+        """Re-read the config file only if its modification time changed"""
+        if self._file_mtime() != self.config_mtime:
+            self.load_config()
+
     def update_config(self, sender_email, sender_password, smtp_server, smtp_port):
         """Update and save configuration"""
         self.SENDER_EMAIL = sender_email
         self.SENDER_PASSWORD = sender_password
         self.SMTP_SERVER = smtp_server
         self.SMTP_PORT = smtp_port
-        
+
+        self.save_config()
+
+    def update_performance(self, **values):
+        """Update and save performance settings, e.g. send_workers=8"""
+        for key, value in values.items():
+            setattr(self, key.upper(), value)
+
+        self.save_config()
+
+    def sender_accounts(self):
+        """The main account followed by any extra accounts, as AccountPool expects"""
+        primary = {
+            'sender_email': self.SENDER_EMAIL,
+            'sender_password': self.SENDER_PASSWORD,
+            'smtp_server': self.SMTP_SERVER,
+            'smtp_port': self.SMTP_PORT,
+            'rate_limit': self.RATE_LIMIT,
+            'daily_quota': self.DAILY_QUOTA
+        }
+        return [primary] + [dict(account) for account in self.SENDER_ACCOUNTS]
+
+    def image_encoding(self):
+        """Attachment encoding keyword arguments for ImageGenerator"""
+        return {
+            'encoding': self.IMAGE_FORMAT,
+            'quality': self.IMAGE_QUALITY,
+            'max_dimension': self.IMAGE_MAX_DIMENSION or None,
+            'flatten': self.IMAGE_FLATTEN
+        }
+
+    def save_config(self):
+        """Write current configuration to file"""
         config = {
-            'sender_email': sender_email,
-            'sender_password': sender_password,
-            'smtp_server': smtp_server,
-            'smtp_port': smtp_port
+            'sender_email': self.SENDER_EMAIL,
+            'sender_password': self.SENDER_PASSWORD,
+            'smtp_server': self.SMTP_SERVER,
+            'smtp_port': self.SMTP_PORT,
+            'daily_quota': self.DAILY_QUOTA,
+            'sender_accounts': self.SENDER_ACCOUNTS,
+            'send_workers': self.SEND_WORKERS,
+            'rate_limit': self.RATE_LIMIT,
+            'max_messages_per_connection': self.MAX_MESSAGES_PER_CONNECTION,
+            'image_workers': self.IMAGE_WORKERS,
+            'image_chunk_size': self.IMAGE_CHUNK_SIZE,
+            'image_cache_max_mb': self.IMAGE_CACHE_MAX_MB,
+            'image_format': self.IMAGE_FORMAT,
+            'image_quality': self.IMAGE_QUALITY,
+            'image_max_dimension': self.IMAGE_MAX_DIMENSION,
+            'image_flatten': self.IMAGE_FLATTEN
         }
-        
+
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
         with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=4)
\ No newline at end of file
+            json.dump(config, f, indent=4)
+        self.config_mtime = self._file_mtime()
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings():
+    """
+    Shared Settings for the process
+
+    Built once and re-read only when config/config.json changes on disk,
+    so a Streamlit rerun costs a stat() instead of parsing the file.
+    """
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            _settings = Settings()
+        else:
+            _settings.reload_if_changed()
+        return _settings
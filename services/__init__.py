@@ -1,5 +1,19 @@
-from .image_generator import ImageGenerator
-from .email_sender import EmailSender
-from .scheduler import EmailScheduler
+import importlib
 
-__all__ = ['ImageGenerator', 'EmailSender', 'EmailScheduler']
\ No newline at end of file
+# Services are imported on first use, so importing one submodule (or this
+# package) does not load PIL, smtplib and the scheduler along with it
+_EXPORTS = {
+    'ImageGenerator': 'services.image_generator',
+    'EmailSender': 'services.email_sender',
+    'EmailScheduler': 'services.scheduler'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
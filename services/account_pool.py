@@ -0,0 +1,326 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from services.email_sender import EmailSender, SENT, TRANSIENT, make_result, send_jobs
+from services.rate_limiter import get_rate_limiter
+
+# Cool-down after a relay throttles or drops us; doubles while it keeps failing
+COOLDOWN = 60
+MAX_COOLDOWN = 900
+
+# Weight of an account with neither a daily quota nor a rate limit
+UNLIMITED_WEIGHT = 36000
+
+
+class QuotaLedger:
+    def __init__(self, db_path="data/account_usage.db"):
+        """
+        Messages sent per account per day, so daily quotas survive restarts
+
+        Args:
+            db_path: SQLite file for the ledger
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS usage (
+                    account TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    sent INTEGER NOT NULL,
+                    PRIMARY KEY (account, day)
+                )
+                """
+            )
+
+    @staticmethod
+    def today():
+        """The ledger's current day, as stored in the usage table"""
+        return date.today().isoformat()
+
+    def sent_today(self, account, day=None):
+        """Messages an account sent on a day (default today)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sent FROM usage WHERE account = ? AND day = ?",
+                (account, day or self.today())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def add(self, counts, day=None):
+        """Add {account: messages} to a day's usage (default today) in one transaction"""
+        day = day or self.today()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO usage (account, day, sent) VALUES (?, ?, ?) "
+                "ON CONFLICT (account, day) DO UPDATE SET sent = sent + excluded.sent",
+                ((account, day, count) for account, count in counts.items() if count)
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SenderAccount:
+    """One sending account or relay plus its quota and health state"""
+
+    def __init__(self, config, sender, sent_today=0):
+        self.email = config['sender_email']
+        self.smtp_server = config['smtp_server']
+        self.rate_limit = float(config.get('rate_limit') or 0)
+        self.daily_quota = int(config.get('daily_quota') or 0)
+        self.sender = sender
+
+        self.sent_today = sent_today
+        self.in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.failovers = 0
+        self.first_sent = None
+        self.last_sent = None
+        self.throttled_until = 0.0
+        self.cooldown = COOLDOWN
+        self.unflushed = 0
+
+    def remaining(self):
+        """Messages left in today's quota (inf when there is no quota)"""
+        if not self.daily_quota:
+            return math.inf
+        return max(0, self.daily_quota - self.sent_today - self.in_flight)
+
+    def weight(self):
+        """Capacity for the next hour: remaining quota, capped by the rate limit"""
+        capacity = min(self.remaining(), self.rate_limit * 3600 if self.rate_limit else math.inf)
+        return UNLIMITED_WEIGHT if capacity == math.inf else capacity
+
+    def available(self, now):
+        return now >= self.throttled_until and self.remaining() > 0
+
+    def status(self, now):
+        if self.remaining() <= 0:
+            return 'quota exhausted'
+        if now < self.throttled_until:
+            return f'cooling down ({self.throttled_until - now:.0f}s)'
+        return 'ok'
+
+
+class AccountPool:
+    def __init__(self, accounts, pool_size=1, max_messages_per_connection=100,
+                 use_tls=True, ledger=None):
+        """
+        Spread a campaign over several sender accounts or relays
+
+        Each recipient key is assigned by weighted rendezvous hashing, so
+        accounts get a share proportional to their remaining capacity
+        (daily quota left, capped by their rate limit) and a key keeps its
+        account across retries. An account that throttles or drops the
+        connection is cooled down and its messages fail over to the next
+        account in the key's ranking; a refused recipient (e.g. greylisting)
+        neither cools its account down nor fails over. When every account
+        is cooling down, a message waits for the first one to recover.
+        Accounts over their daily quota are skipped.
+
+        Offers the same send_job/send_many/close interface as EmailSender.
+
+        Args:
+            accounts: List of dicts with sender_email, sender_password,
+                smtp_server, smtp_port and optional rate_limit (messages/sec)
+                and daily_quota (0 = none)
+            pool_size: SMTP connections per account
+            max_messages_per_connection: As for EmailSender
+            use_tls: As for EmailSender
+            ledger: QuotaLedger for daily usage (None = data/account_usage.db)
+        """
+        if not accounts:
+            raise ValueError("At least one sender account is required")
+
+        self.owns_ledger = ledger is None
+        self.ledger = ledger or QuotaLedger()
+        self.day = self.ledger.today()
+        self.lock = threading.Lock()
+        self.assignments = {}
+        self.accounts = []
+        for config in accounts:
+            sender = EmailSender(
+                config['sender_email'],
+                config.get('sender_password', ''),
+                config['smtp_server'],
+                int(config['smtp_port']),
+                pool_size=pool_size,
+                max_messages_per_connection=max_messages_per_connection,
+                use_tls=use_tls
+            )
+            # Quotas and limits belong to the login, not the server
+            sender.rate_limiter = get_rate_limiter(
+                config['smtp_server'], config.get('rate_limit'), config['sender_email']
+            )
+            self.accounts.append(
+                SenderAccount(config, sender, self.ledger.sent_today(config['sender_email'], self.day))
+            )
+        self.max_workers = pool_size * len(self.accounts)
+
+    def send_many(self, jobs, workers=None, progress_callback=None,
+                  journal=None, campaign_id=None):
+        """
+        Send many emails concurrently across the accounts
+
+        Same arguments and results as EmailSender.send_many; workers
+        defaults to the total number of connections over all accounts.
+        """
+        return send_jobs(self.send_job, jobs, workers or self.max_workers,
+                         progress_callback, journal, campaign_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _score(key, account):
+        """Weighted rendezvous score of an account for a key"""
+        digest = hashlib.blake2b(f"{key}\0{account.email}".encode('utf-8'), digest_size=6).digest()
+        unit = (int.from_bytes(digest, 'big') + 1) / (2 ** 48 + 1)
+        return account.weight() / -math.log(unit)
+
+    def _roll_day(self):
+        """
+        Start a new quota day when the ledger's date changes; caller holds the lock
+
+        Returns:
+            (day, counts) of usage still to be written for the previous
+            day, or None
+        """
+        today = self.ledger.today()
+        if today == self.day:
+            return None
+        flush = (self.day, {a.email: a.unflushed for a in self.accounts})
+        for account in self.accounts:
+            account.unflushed = 0
+            account.sent_today = 0
+        self.day = today
+        return flush
+
+    def _assign(self, key, exclude=()):
+        """Pick and reserve an account for a key, or None if none can send"""
+        now = time.monotonic()
+        with self.lock:
+            flush = self._roll_day()
+        if flush:
+            self.ledger.add(flush[1], flush[0])
+
+        with self.lock:
+            account = self.assignments.get(key)
+            if account is None or account in exclude or not account.available(now):
+                candidates = [a for a in self.accounts if a not in exclude and a.available(now)]
+                if not candidates:
+                    return None
+                account = max(candidates, key=lambda a: self._score(key, a))
+                self.assignments[key] = account
+            account.in_flight += 1
+            return account
+
+    def _finish(self, account, result):
+        flush = None
+        with self.lock:
+            account.in_flight -= 1
+            day = self.day
+            now = time.monotonic()
+            if result['status'] == SENT:
+                account.sent += 1
+                account.sent_today += 1
+                account.unflushed += 1
+                account.first_sent = account.first_sent or now
+                account.last_sent = now
+                account.cooldown = COOLDOWN
+                if account.unflushed >= 50:
+                    flush = {account.email: account.unflushed}
+                    account.unflushed = 0
+            else:
+                account.failed += 1
+                if result['status'] == TRANSIENT and result.get('session'):
+                    # Throttled or disconnected: rest this account for a while
+                    account.throttled_until = now + account.cooldown
+                    account.cooldown = min(account.cooldown * 2, MAX_COOLDOWN)
+                    account.failovers += 1
+        if flush:
+            self.ledger.add(flush, day)
+
+    def _next_available(self, exclude=()):
+        """Seconds until a cooling-down account can send again, or None if none can today"""
+        now = time.monotonic()
+        with self.lock:
+            waiting = [a.throttled_until for a in self.accounts
+                       if a not in exclude and a.remaining() > 0]
+        if not waiting:
+            return None
+        return max(0.0, min(waiting) - now)
+
+    def send_job(self, job):
+        """Send one job on its assigned account, failing over on session errors"""
+        key = job.get('key', job['recipient'])
+        tried = []
+        result = None
+        while len(tried) < len(self.accounts):
+            account = self._assign(key, tried)
+            if account is None:
+                wait = self._next_available(tried)
+                if wait is None:
+                    break
+                time.sleep(wait)
+                continue
+            result = account.sender.send_job(job)
+            result['account'] = account.email
+            self._finish(account, result)
+            # Only throttling or a dropped session moves the message on;
+            # a refused recipient would be refused by any account
+            if result['status'] != TRANSIENT or not result.get('session'):
+                return result
+            tried.append(account)
+
+        if result is None:
+            result = make_result(job['recipient'], TRANSIENT, "No sender account available (over quota)")
+        return result
+
+    def stats(self):
+        """Per-account throughput and quota usage, for display"""
+        now = time.monotonic()
+        with self.lock:
+            return [
+                {
+                    'account': a.email,
+                    'server': a.smtp_server,
+                    'status': a.status(now),
+                    'sent': a.sent,
+                    'failed': a.failed,
+                    'failovers': a.failovers,
+                    'emails_per_second': (
+                        a.sent / (a.last_sent - a.first_sent)
+                        if a.sent > 1 and a.last_sent > a.first_sent else None
+                    ),
+                    'sent_today': a.sent_today,
+                    'daily_quota': a.daily_quota or None
+                }
+                for a in self.accounts
+            ]
+
+    def close(self):
+        with self.lock:
+            counts = {a.email: a.unflushed for a in self.accounts}
+            for account in self.accounts:
+                account.unflushed = 0
+            day = self.day
+        self.ledger.add(counts, day)
+        for account in self.accounts:
+            account.sender.close()
+        if self.owns_ledger:
+            self.ledger.close()
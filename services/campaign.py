@@ -0,0 +1,144 @@
+from pathlib import Path
+
+import numpy as np
+
+DATE_FORMAT = '%d/%m/%Y'
+
+
+class CampaignRecipient:
+    """One row of a campaign plan"""
+    __slots__ = ('key', 'name', 'email', 'date_text')
+
+    def __init__(self, key, name, email, date_text):
+        self.key = key
+        self.name = name
+        self.email = email
+        self.date_text = date_text
+
+
+class CampaignPlan:
+    def __init__(self, keys, names, emails, date_texts):
+        """
+        Column-oriented list of messages to generate and send
+
+        Built once per import and send mode, then shared by image
+        generation, sending and scheduling so the recipient frame is
+        grouped and formatted only once.
+
+        Args:
+            keys: Image/message key per row (Email in Combine Days mode,
+                "<Email>_<row index>" in Separate Days mode)
+            names: Recipient names
+            emails: Recipient addresses
+            date_texts: Date text drawn on each image
+        """
+        self.keys = np.asarray(keys, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.emails = np.asarray(emails, dtype=object)
+        self.date_texts = np.asarray(date_texts, dtype=object)
+
+    @classmethod
+    def from_dataframe(cls, df, send_mode):
+        """
+        Build a plan from a recipient frame
+
+        Args:
+            df: DataFrame with Name, Email and Date (datetime64) columns
+            send_mode: "Combine Days" (one message per person, dates joined)
+                or "Separate Days" (one message per row)
+        """
+        date_text = df['Date'].dt.strftime(DATE_FORMAT)
+
+        if send_mode == "Combine Days":
+            grouped = (
+                df[['Name', 'Email']]
+                .assign(DateText=date_text)
+                .groupby(['Name', 'Email'], sort=True)['DateText']
+                .agg(', '.join)
+            )
+            names = grouped.index.get_level_values('Name')
+            emails = grouped.index.get_level_values('Email')
+            return cls(emails, names, emails, grouped.to_numpy())
+
+        keys = df['Email'].astype(str) + '_' + df.index.astype(str)
+        return cls(keys, df['Name'], df['Email'], date_text)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        for row in zip(self.keys, self.names, self.emails, self.date_texts):
+            yield CampaignRecipient(*row)
+
+    def render_rows(self):
+        """(key, name, date_text) tuples for ImageGenerator.generate_batch"""
+        return zip(self.keys, self.names, self.date_texts)
+
+    def bodies(self, body_template):
+        """Personalize the body for every row ('{name}' is replaced)"""
+        if '{name}' not in body_template:
+            return [body_template] * len(self)
+        parts = body_template.split('{name}')
+        return [str(name).join(parts) for name in self.names]
+
+    def job(self, i, subject, body_template):
+        """Send job for row i, without an image (see jobs)"""
+        return {
+            'key': self.keys[i],
+            'recipient': self.emails[i],
+            'subject': subject,
+            'body': body_template.replace('{name}', str(self.names[i])),
+            'name': self.names[i],
+            'date': self.date_texts[i]
+        }
+
+    def iter_jobs(self, subject, body_template):
+        """
+        Send jobs without images, built one at a time
+
+        For stream_campaign, so a large campaign never holds a job dict
+        (and its personalized body) for every row at once.
+        """
+        for i in range(len(self)):
+            yield self.job(i, subject, body_template)
+
+    def jobs(self, subject, body_template, images=None):
+        """
+        Send jobs for EmailSender.send_many, EmailScheduler.schedule_emails
+        and stream_campaign
+
+        Args:
+            subject: Email subject
+            body_template: Body text with optional '{name}' placeholder
+            images: Optional dict of key -> image path; when given, rows
+                without an image are skipped
+
+        Returns:
+            List of job dicts with 'key', 'recipient', 'subject', 'body',
+            'name', 'date' and, when images are given, 'image_path' and
+            'image_name' (the attachment name, e.g. John_Doe_01-02-2026.png;
+            cached files are named by their hash)
+        """
+        from services.image_generator import ImageGenerator
+
+        bodies = self.bodies(body_template)
+        jobs = []
+        for i, key in enumerate(self.keys):
+            job = {
+                'key': key,
+                'recipient': self.emails[i],
+                'subject': subject,
+                'body': bodies[i],
+                'name': self.names[i],
+                'date': self.date_texts[i]
+            }
+            if images is not None:
+                job['image_path'] = images.get(key)
+                if job['image_path'] is None:
+                    continue
+                job['image_name'] = ImageGenerator.output_name(
+                    str(job['name']), str(job['date']), Path(job['image_path']).suffix.lstrip('.')
+                )
+            jobs.append(job)
+        return jobs
+
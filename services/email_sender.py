@@ -1,55 +1,296 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
-from pathlib import Path
+import socket
+import threading
+import time
+
+from services.smtp_pool import SMTPConnectionPool
+from services.rate_limiter import get_rate_limiter
+from services.message_factory import MessageFactory
+from utils.logger import metrics
+
+# Result statuses
+SENT = 'sent'
+SKIPPED = 'skipped'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# Replies that mean "slow down"; retries of them wait at least THROTTLE_PAUSE
+THROTTLE_CODES = {421, 450, 451, 452}
+THROTTLE_PAUSE = 10
+
+def make_result(recipient, status, error=None, code=None, session=False):
+    """
+    Result dict reported for every job
+
+    ``session`` marks failures of the SMTP session as a whole (throttling
+    or a dropped connection) rather than of this one recipient.
+    """
+    return {
+        'recipient': recipient,
+        'status': status,
+        'success': status in (SENT, SKIPPED),
+        'skipped': status == SKIPPED,
+        'error': error,
+        'code': code,
+        'session': session
+    }
+
+def classify_error(exc):
+    """
+    Split send errors into transient (worth retrying) and permanent
+
+    Only 4xx replies, dropped connections and timeouts are transient;
+    any other SMTP, TLS or socket error is permanent.
+
+    Returns:
+        (status, smtp_code) where status is TRANSIENT or PERMANENT and
+        smtp_code is None when the server gave no reply code
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+        code = min(codes) if codes else None
+        transient = bool(codes) and all(400 <= c < 500 for c in codes)
+        return (TRANSIENT if transient else PERMANENT), code
+
+    if isinstance(exc, smtplib.SMTPResponseException):
+        code = exc.smtp_code
+        return (TRANSIENT if 400 <= code < 500 else PERMANENT), code
+
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError)):
+        return TRANSIENT, None
+
+    return PERMANENT, None
+
+def is_session_error(exc):
+    """
+    True when an error concerns the whole SMTP session, not one recipient
+
+    That is a dropped connection or timeout, a 421 reply to any command,
+    or a 4.7.x policy reply to MAIL or DATA. Refusals of RCPT (e.g. a
+    450 greylisting reply) only concern their recipient.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return any(code == 421 for code, _ in exc.recipients.values())
+
+    if isinstance(exc, smtplib.SMTPResponseException):
+        if exc.smtp_code == 421:
+            return True
+        message = exc.smtp_error or b''
+        if isinstance(message, str):
+            message = message.encode('utf-8', 'replace')
+        return (isinstance(exc, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError))
+                and 400 <= exc.smtp_code < 500 and message.startswith(b'4.7.'))
+
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError))
+
+def send_jobs(send_job, jobs, workers, progress_callback=None,
+              journal=None, campaign_id=None):
+    """
+    Send jobs on a thread pool with send_job(job) -> result dict
+
+    Shared by EmailSender and AccountPool. Jobs already journaled for
+    ``campaign_id`` are skipped and accepted ones are recorded; see
+    EmailSender.send_many for the arguments.
+
+    Returns:
+        List of result dicts in job order
+    """
+    jobs = list(jobs)
+    total = len(jobs)
+    results = [None] * total
+    workers = max(1, min(workers, total or 1))
+    done = 0
+
+    # Jobs journaled by an earlier, interrupted run are not sent again
+    pending = []
+    sent_keys = journal.sent_keys(campaign_id) if journal else ()
+    for i, job in enumerate(jobs):
+        if job.get('key', job['recipient']) in sent_keys:
+            results[i] = make_result(job['recipient'], SKIPPED)
+            metrics.increment('emails_skipped')
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, results[i])
+        else:
+            pending.append(i)
+
+    def send(job):
+        # Journaled on the worker, so an accepted message is recorded even
+        # if the caller stops reading results
+        result = send_job(job)
+        if result['success'] and journal:
+            journal.record(campaign_id, job.get('key', job['recipient']), result['recipient'])
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(send, jobs[i]): i for i in pending}
+
+        for future in as_completed(futures):
+            i = futures[future]
+            result = future.result()
+            results[i] = result
+            done += 1
+
+            if progress_callback:
+                progress_callback(done, total, result)
+    except BaseException:
+        # Stopped by the caller (e.g. a Streamlit rerun): drop queued sends
+        # instead of waiting for them; in-flight ones still finish
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    return results
 
 class EmailSender:
-    def __init__(self, sender_email, password, smtp_server, smtp_port):
+    def __init__(self, sender_email, password, smtp_server, smtp_port,
+                 pool_size=1, max_messages_per_connection=100, rate_limit=None,
+                 use_tls=True):
         self.sender_email = sender_email
         self.password = password
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
-    
+        self.max_workers = pool_size
+
+        # Logged-in sessions are reused across send_email calls
+        self.pool = SMTPConnectionPool(
+            sender_email,
+            password,
+            smtp_server,
+            smtp_port,
+            max_size=pool_size,
+            max_messages_per_connection=max_messages_per_connection,
+            use_tls=use_tls
+        )
+
+        # Encoded bodies and attachments are shared between messages
+        self.messages = MessageFactory(sender_email)
+
+        # Shared per-server limit in messages/sec (None = unlimited)
+        self.rate_limiter = get_rate_limiter(smtp_server, rate_limit)
+
+        # Set when the server asks us to slow down
+        self.throttled_until = 0.0
+        self.throttle_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close pooled SMTP connections"""
+        self.pool.close()
+
+    def build_message(self, recipient, subject, body, image_path=None,
+                      image_data=None, image_name=None):
+        """
+        Build the MIME message for one recipient
+
+        The attachment is either read from ``image_path`` or taken as
+        in-memory ``image_data`` bytes named ``image_name``; its MIME
+        subtype follows the file extension (png, jpeg, webp). Encoded
+        parts are reused across messages (see MessageFactory).
+        """
+        return self.messages.build(recipient, subject, body, image_path, image_data, image_name)
+
+    def throttle(self, seconds=THROTTLE_PAUSE):
+        """Pause all sends through this sender for ``seconds``"""
+        with self.throttle_lock:
+            self.throttled_until = max(self.throttled_until, time.monotonic() + seconds)
+
+    def send_message(self, msg):
+        """Send a prepared message over a pooled connection"""
+        wait = self.throttled_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        self.pool.send_message(msg)
+
     def send_email(self, recipient, subject, body, image_path=None):
         """
         Send email with optional image attachment
-        
+
         Args:
             recipient: Recipient email address
             subject: Email subject
             body: Email body text
             image_path: Path to image attachment (optional)
-            
+
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = self.sender_email
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            
-            # Attach body
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Attach image if provided
-            if image_path and Path(image_path).exists():
-                with open(image_path, 'rb') as f:
-                    img_data = f.read()
-                    image = MIMEImage(img_data, name=Path(image_path).name)
-                    msg.attach(image)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.password)
-                server.send_message(msg)
-            
+        result = self.send_job({
+            'recipient': recipient,
+            'subject': subject,
+            'body': body,
+            'image_path': image_path
+        })
+
+        if result['success']:
             print(f"✅ Email sent to {recipient}")
-            return True
-            
+        else:
+            print(f"❌ Error sending email to {recipient}: {result['error']}")
+        return result['success']
+
+    def send_job(self, job):
+        """
+        Send one job dict and return its result dict
+
+        Errors are classified as TRANSIENT or PERMANENT; session-level
+        replies (421, or 4.7.x to MAIL/DATA) also pause this sender for
+        THROTTLE_PAUSE seconds. Each failure is counted once, under the
+        stage it happened in.
+        """
+        stage = 'mime_build'
+        try:
+            start = time.perf_counter()
+            msg = self.build_message(
+                job['recipient'],
+                job['subject'],
+                job['body'],
+                job.get('image_path'),
+                job.get('image_data'),
+                job.get('image_name')
+            )
+            metrics.observe('mime_build', time.perf_counter() - start)
+
+            stage = 'send'
+            self.send_message(msg)
+            metrics.increment('emails_sent')
+            return make_result(job['recipient'], SENT)
         except Exception as e:
-            print(f"❌ Error sending email to {recipient}: {str(e)}")
-            return False
\ No newline at end of file
+            status, code = classify_error(e)
+            session = is_session_error(e)
+            metrics.error(stage, e)
+            metrics.increment(f'emails_{status}')
+            if session and code is not None:
+                self.throttle()
+                metrics.increment('throttled')
+            return make_result(job['recipient'], status, str(e), code, session)
+
+    def send_many(self, jobs, workers=None, progress_callback=None,
+                  journal=None, campaign_id=None):
+        """
+        Send many emails concurrently over the connection pool
+
+        Args:
+            jobs: List of dicts with 'recipient', 'subject', 'body' and
+                optional 'image_path' or 'image_data'/'image_name'
+            workers: Number of worker threads (defaults to the pool size)
+            progress_callback: Called as progress_callback(done, total, result)
+                from the calling thread after each message
+            journal: Optional SendJournal; jobs already journaled for
+                ``campaign_id`` are skipped and accepted ones are recorded
+            campaign_id: Campaign the jobs belong to (required with journal)
+
+        Returns:
+            List of result dicts (see make_result) in job order; 'status'
+            is 'sent', 'skipped', 'transient' or 'permanent'
+        """
+        return send_jobs(self.send_job, jobs, workers or self.max_workers,
+                         progress_callback, journal, campaign_id)
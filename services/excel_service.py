@@ -0,0 +1,215 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.logger import metrics
+from utils.validators import validate_recipients
+
+REQUIRED_COLUMNS = ['Name', 'Email', 'Date']
+DATE_FORMAT = '%d/%m/%Y'
+
+SUPPORTED_TYPES = ['xlsx', 'xls', 'csv', 'parquet']
+
+
+def _normalize_chunk(df):
+    """Keep the required columns with stable types: Name/Email str, Date datetime64"""
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"File must contain columns: {', '.join(REQUIRED_COLUMNS)}")
+
+    df = df[REQUIRED_COLUMNS].copy()
+    for col in ('Name', 'Email'):
+        df[col] = df[col].astype(str).where(df[col].notna(), None)
+    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT, errors='coerce')
+    df['Date'] = df['Date'].astype('datetime64[ns]')
+    return df
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('Name', pa.string()),
+        ('Email', pa.string()),
+        ('Date', pa.timestamp('ns'))
+    ])
+
+
+def _iter_xlsx(source, chunk_size):
+    """Stream rows from an .xlsx file with openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col).strip() if col is not None else '' for col in header]
+
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_parquet(source, chunk_size):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def iter_recipient_chunks(source, filename, chunk_size=50000):
+    """
+    Read a recipient list in typed chunks
+
+    Args:
+        source: Path or file-like object
+        filename: Original file name; its extension selects the reader
+        chunk_size: Rows per chunk
+
+    Yields:
+        DataFrames with Name, Email and Date columns (Date is datetime64,
+        NaT where it could not be parsed as DD/MM/YYYY)
+    """
+    ext = Path(filename).suffix.lower().lstrip('.')
+
+    if ext == 'xlsx':
+        chunks = _iter_xlsx(source, chunk_size)
+    elif ext == 'csv':
+        chunks = pd.read_csv(source, chunksize=chunk_size, dtype=str, skip_blank_lines=True)
+    elif ext == 'parquet':
+        chunks = _iter_parquet(source, chunk_size)
+    elif ext == 'xls':
+        # Legacy .xls cannot be streamed; read it once and slice
+        df = pd.read_excel(source)
+        chunks = (df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size))
+    else:
+        raise ValueError(f"Unsupported file type: .{ext}")
+
+    for chunk in chunks:
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        yield _normalize_chunk(chunk)
+
+
+def import_recipients(source, filename, output_dir="data/processed",
+                      chunk_size=50000, preview_rows=100):
+    """
+    Stream a recipient list into a Parquet file
+
+    Only one chunk is held in memory at a time, and the file is written in
+    a compact columnar format instead of being re-encoded as xlsx. Each
+    chunk is validated and de-duplicated; rejected rows go to a CSV report
+    next to the Parquet file.
+
+    Args:
+        source: Path or file-like object
+        filename: Original file name
+        output_dir: Directory for the processed Parquet file
+        chunk_size: Rows per chunk
+        preview_rows: Rows kept for display
+
+    Returns:
+        Dict with 'path', 'rows' (clean rows), 'preview' (DataFrame),
+        'unique_dates', 'valid_emails', 'rejected' (count),
+        'rejected_reasons' (count per reason), 'rejected_path' (None when
+        nothing was rejected) and 'rejected_preview' (DataFrame)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    start = time.perf_counter()
+    output_path = Path(output_dir) / f"{Path(filename).stem}.parquet"
+    rejected_path = Path(output_dir) / f"{Path(filename).stem}_rejected.csv"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    rejected_path.unlink(missing_ok=True)
+
+    schema = _parquet_schema()
+    writer = None
+    total = 0
+    valid_emails = 0
+    dates = set()
+    preview = []
+    seen = set()
+    rejected_total = 0
+    rejected_reasons = {}
+    rejected_preview = []
+
+    try:
+        for chunk in iter_recipient_chunks(source, filename, chunk_size):
+            with metrics.timer('validation'):
+                chunk, rejected = validate_recipients(chunk, seen)
+            if len(rejected):
+                rejected.to_csv(
+                    rejected_path,
+                    mode='a',
+                    header=not rejected_total,
+                    index=False,
+                    date_format=DATE_FORMAT
+                )
+                rejected_total += len(rejected)
+                for reason, count in rejected['Reason'].value_counts().items():
+                    rejected_reasons[reason] = rejected_reasons.get(reason, 0) + int(count)
+                if sum(len(p) for p in rejected_preview) < preview_rows:
+                    rejected_preview.append(rejected.head(preview_rows))
+
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, schema)
+            writer.write_table(table)
+
+            total += len(chunk)
+            valid_emails += int(chunk['Email'].notna().sum())
+            dates.update(chunk['Date'].dropna().unique())
+            if sum(len(p) for p in preview) < preview_rows:
+                preview.append(chunk.head(preview_rows))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # Empty file: still write a valid, empty table
+        pq.write_table(schema.empty_table(), output_path)
+
+    if preview:
+        preview_df = pd.concat(preview, ignore_index=True).head(preview_rows)
+    else:
+        preview_df = pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+    if rejected_preview:
+        rejected_preview_df = pd.concat(rejected_preview, ignore_index=True).head(preview_rows)
+    else:
+        rejected_preview_df = pd.DataFrame(columns=REQUIRED_COLUMNS + ['Reason'])
+
+    metrics.observe('import', time.perf_counter() - start)
+    metrics.increment('recipients_imported', total)
+    metrics.increment('recipients_rejected', rejected_total)
+
+    return {
+        'path': str(output_path),
+        'rows': total,
+        'preview': preview_df,
+        'unique_dates': len(dates),
+        'valid_emails': valid_emails,
+        'rejected': rejected_total,
+        'rejected_reasons': rejected_reasons,
+        'rejected_path': str(rejected_path) if rejected_total else None,
+        'rejected_preview': rejected_preview_df
+    }
+
+
+def load_recipients(path):
+    """Load a processed recipient file"""
+    return pd.read_parquet(path)
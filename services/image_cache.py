@@ -0,0 +1,78 @@
+import hashlib
+import os
+from pathlib import Path
+
+
+class ImageCache:
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        """
+        Content-addressed store for generated images
+
+        Files live at ``cache_dir/<key[:2]>/<key>.<ext>``. A file's mtime is
+        bumped on every hit, so eviction can drop the least recently used
+        files first once the total size exceeds ``max_bytes``.
+
+        Args:
+            cache_dir: Root directory of the cache
+            max_bytes: Disk budget for cached images
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash the render inputs into a cache key"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(repr(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path_for(self, key, ext='png'):
+        """Return the sharded path for a key (the file may not exist yet)"""
+        return self.cache_dir / key[:2] / f"{key}.{ext}"
+
+    def get(self, key, ext='png'):
+        """Return the cached file path on a hit, otherwise None"""
+        path = self.path_for(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def evict(self, keep=()):
+        """
+        Delete least recently used files until the cache fits its budget
+
+        Args:
+            keep: Paths that must not be deleted (e.g. the current batch)
+
+        Returns:
+            Number of files removed
+        """
+        keep = {str(p) for p in keep if p}
+        entries = []
+        total = 0
+        for shard in self.cache_dir.iterdir() if self.cache_dir.exists() else ():
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard):
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -1,18 +1,242 @@
 from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import hashlib
 import os
+import time
+
+from services.image_cache import ImageCache
+from services.text_tiles import TextTileCache
+from utils.logger import metrics
+
+FONT_PATH = Path("assets/fonts/arial.ttf")
+
+# Attachment encodings: name -> (PIL format, file extension)
+ENCODINGS = {
+    'png': ('PNG', 'png'),
+    'png8': ('PNG', 'png'),    # palette PNG, at most 256 colors
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+}
+
+def flatten_image(img, background=(255, 255, 255)):
+    """Composite an image with transparency onto a solid RGB background"""
+    if img.mode not in ('RGBA', 'LA', 'P'):
+        return img.convert('RGB')
+    img = img.convert('RGBA')
+    flat = Image.new('RGB', img.size, background)
+    flat.paste(img, mask=img.getchannel('A'))
+    return flat
+
+def encode_image(img, fp, encoding='png', quality=85, max_dimension=None, flatten=False):
+    """
+    Save a rendered image in one of ENCODINGS
+
+    Args:
+        img: PIL image (usually RGBA at template resolution)
+        fp: File path or binary file object
+        encoding: Key of ENCODINGS
+        quality: 1-100 for jpeg/webp (ignored for png)
+        max_dimension: Downscale so the longest side is at most this (None = keep)
+        flatten: Drop the alpha channel onto white (always done for jpeg)
+    """
+    if max_dimension and max(img.size) > max_dimension:
+        img = img.copy()
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    if flatten or encoding == 'jpeg':
+        img = flatten_image(img)
+
+    if encoding == 'png8':
+        method = Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        img.quantize(256, method=method).save(fp, 'PNG', optimize=True)
+    elif encoding == 'jpeg':
+        img.save(fp, 'JPEG', quality=quality, optimize=True)
+    elif encoding == 'webp':
+        img.save(fp, 'WEBP', quality=quality, method=4)
+    else:
+        img.save(fp, 'PNG')
 
 class ImageGenerator:
-    def __init__(self, template_path):
+    def __init__(self, template_path, cache_max_bytes=1024 * 1024 * 1024,
+                 encoding='png', quality=85, max_dimension=None, flatten=False,
+                 text_cache_bytes=64 * 1024 * 1024):
+        """
+        Render personalized images from a template
+
+        Args:
+            template_path: Template image file
+            cache_max_bytes: Disk budget for generated images
+            encoding: Attachment encoding, a key of ENCODINGS ('png' keeps
+                full RGBA PNGs, 'png8' is a palette PNG, 'jpeg'/'webp' are lossy)
+            quality: 1-100 for jpeg and webp
+            max_dimension: Downscale attachments so the longest side fits
+            flatten: Drop the alpha channel onto white (always done for jpeg)
+            text_cache_bytes: Memory for rasterized name/date tiles
+                (0 draws text directly on every render)
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown image encoding: {encoding}")
+
         self.template_path = template_path
+        self.encoding = encoding
+        self.quality = quality
+        self.max_dimension = max_dimension or None
+        self.flatten = flatten
+        self.extension = ENCODINGS[encoding][1]
         self.output_dir = Path("assets/images/generated")
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        
-    def generate_image(self, name, date, font_size=40, color="#000000", 
+
+        # Generated images are stored by a hash of everything that affects
+        # their pixels, so unchanged rows are never rendered twice
+        self.cache = ImageCache(self.output_dir, cache_max_bytes)
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self._template_digest = None
+
+        # Decoded template, fonts and colors are reused across renders
+        self._template = None
+        self._fonts = {}
+        self._colors = {}
+        self.font_path = str(FONT_PATH) if FONT_PATH.exists() else None
+        self.text_tiles = TextTileCache(text_cache_bytes) if text_cache_bytes else None
+
+    def _get_template(self):
+        """Decode the template once; callers must copy() before drawing"""
+        if self._template is None:
+            with metrics.timer('template_load'), Image.open(self.template_path) as img:
+                self._template = img.convert('RGBA')
+        return self._template
+
+    def _get_template_digest(self):
+        """Hash the template file bytes once"""
+        if self._template_digest is None:
+            with open(self.template_path, 'rb') as f:
+                self._template_digest = hashlib.sha256(f.read()).hexdigest()
+        return self._template_digest
+
+    def cache_key(self, name, date, font_size, color, name_pos, date_pos):
+        """Cache key for one render: template bytes, font, style, positions and text"""
+        return ImageCache.make_key(
+            self._get_template_digest(),
+            self.font_path,
+            self.encoding_options(),
+            font_size,
+            color.lower(),
+            tuple(name_pos),
+            tuple(date_pos),
+            f"{name}",
+            f"{date}"
+        )
+
+    def encoding_options(self):
+        """Encoding keyword arguments, e.g. to build an identical generator"""
+        return {
+            'encoding': self.encoding,
+            'quality': self.quality,
+            'max_dimension': self.max_dimension,
+            'flatten': self.flatten
+        }
+
+    def encode(self, img, fp):
+        """Save a rendered image with this generator's encoding"""
+        with metrics.timer('encode'):
+            encode_image(img, fp, **self.encoding_options())
+
+    def encoding_report(self, name, date, font_size=40, color="#000000",
+                        name_pos=(100, 100), date_pos=(100, 200), encodings=ENCODINGS):
+        """
+        Render one image and encode it every way, to compare size and speed
+
+        Quality, max dimension and flattening are this generator's settings.
+
+        Returns:
+            List of dicts with 'encoding', 'bytes', 'seconds' and 'data'
+        """
+        img = self.render(name, date, font_size, color, name_pos, date_pos)
+        report = []
+        for encoding in encodings:
+            buffer = BytesIO()
+            start = time.perf_counter()
+            encode_image(img, buffer, encoding, self.quality, self.max_dimension, self.flatten)
+            report.append({
+                'encoding': encoding,
+                'bytes': buffer.tell(),
+                'seconds': time.perf_counter() - start,
+                'data': buffer.getvalue()
+            })
+        return report
+
+    def _get_font(self, font_size):
+        """Load a font once per (path, size)"""
+        font_path = self.font_path
+        key = (font_path, font_size)
+
+        if key not in self._fonts:
+            # Try to load custom font, fallback to default
+            try:
+                if font_path:
+                    self._fonts[key] = ImageFont.truetype(font_path, font_size)
+                else:
+                    self._fonts[key] = ImageFont.load_default()
+            except Exception:
+                self._fonts[key] = ImageFont.load_default()
+        return self._fonts[key]
+
+    def _get_color(self, color):
+        """Parse a hex color once"""
+        if color not in self._colors:
+            self._colors[color] = self._hex_to_rgb(color)
+        return self._colors[color]
+
+    def render(self, name, date, font_size=40, color="#000000",
+               name_pos=(100, 100), date_pos=(100, 200)):
+        """Draw name and date on a copy of the template and return the PIL image"""
+        template = self._get_template()
+
+        with metrics.timer('render'):
+            # Start from a copy of the cached template
+            img = template.copy()
+
+            font = self._get_font(font_size)
+            color_rgb = self._get_color(color)
+
+            if self.text_tiles is not None:
+                # Names and dates repeat across rows: blit cached text tiles
+                font_key = (self.font_path, font_size)
+                self.text_tiles.draw(img, name_pos, f"{name}", font, font_key, color_rgb)
+                self.text_tiles.draw(img, date_pos, f"{date}", font, font_key, color_rgb)
+            else:
+                draw = ImageDraw.Draw(img)
+                draw.text(name_pos, f"{name}", fill=color_rgb, font=font)
+                draw.text(date_pos, f"{date}", fill=color_rgb, font=font)
+
+        return img
+
+    def render_bytes(self, name, date, font_size=40, color="#000000",
+                     name_pos=(100, 100), date_pos=(100, 200)):
+        """
+        Render an image straight to encoded bytes without touching the disk
+
+        Returns:
+            (image_bytes, filename) tuple; the filename extension matches
+            the encoding
+        """
+        img = self.render(name, date, font_size, color, name_pos, date_pos)
+        buffer = BytesIO()
+        self.encode(img, buffer)
+        return buffer.getvalue(), self.output_name(name, date, self.extension)
+
+    @staticmethod
+    def output_name(name, date, extension='png'):
+        """Human readable attachment filename for a recipient"""
+        return f"{name.replace(' ', '_')}_{date.replace('/', '-').replace(', ', '_')}.{extension}"
+
+    def generate_image(self, name, date, font_size=40, color="#000000",
                       name_pos=(100, 100), date_pos=(100, 200)):
         """
         Generate personalized image with name and date
-        
+
         Args:
             name: Person's name
             date: Date string or combined dates
@@ -20,48 +244,117 @@ class ImageGenerator:
             color: Text color in hex
             name_pos: (x, y) position for name
             date_pos: (x, y) position for date
-            
+
         Returns:
             Path to generated image
         """
         try:
-            # Open template image
-            img = Image.open(self.template_path).convert('RGBA')
-            
-            # Create drawing context
-            draw = ImageDraw.Draw(img)
-            
-            # Try to load custom font, fallback to default
-            try:
-                font_path = Path("assets/fonts/arial.ttf")
-                if font_path.exists():
-                    font = ImageFont.truetype(str(font_path), font_size)
-                else:
-                    font = ImageFont.load_default()
-            except:
-                font = ImageFont.load_default()
-            
-            # Convert hex color to RGB
-            color_rgb = self._hex_to_rgb(color)
-            
-            # Draw name
-            draw.text(name_pos, f"{name}", fill=color_rgb, font=font)
-            
-            # Draw date
-            draw.text(date_pos, f"{date}", fill=color_rgb, font=font)
-            
-            # Save image
-            output_filename = f"{name.replace(' ', '_')}_{date.replace('/', '-').replace(', ', '_')}.png"
-            output_path = self.output_dir / output_filename
-            
-            img.save(output_path, 'PNG')
+            key = self.cache_key(name, date, font_size, color, name_pos, date_pos)
+            cached_path = self.cache.get(key, self.extension)
+            if cached_path:
+                self.cache_stats['hits'] += 1
+                return cached_path
+
+            img = self.render(name, date, font_size, color, name_pos, date_pos)
+
+            # Save image; write then rename so readers never see a partial file
+            output_path = self.cache.path_for(key, self.extension)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.tmp")
+
+            with open(tmp_path, 'wb') as f:
+                self.encode(img, f)
+            os.replace(tmp_path, output_path)
+            self.cache_stats['misses'] += 1
             return str(output_path)
-            
+
         except Exception as e:
             print(f"Error generating image: {str(e)}")
             return None
-    
+
+    def generate_batch(self, rows, font_size=40, color="#000000",
+                       name_pos=(100, 100), date_pos=(100, 200),
+                       workers=1, chunk_size=32):
+        """
+        Generate images for many recipients with shared settings
+
+        Args:
+            rows: Iterable of (key, name, date) tuples
+            font_size, color, name_pos, date_pos: As for generate_image
+            workers: Number of render processes (1 renders in this process)
+            chunk_size: Rows sent to a worker process per task
+
+        Returns:
+            Dict mapping each key to its image path (None on failure),
+            in the same order as rows. Hit/miss counts for the batch are
+            left in ``cache_stats``.
+        """
+        rows = list(rows)
+        settings = (font_size, color, name_pos, date_pos)
+        self.cache_stats = {'hits': 0, 'misses': 0}
+
+        # Resolve cache hits here so only misses are rendered
+        paths = [
+            self.cache.get(self.cache_key(name, date, *settings), self.extension)
+            for _, name, date in rows
+        ]
+        pending = [i for i, path in enumerate(paths) if path is None]
+        self.cache_stats['hits'] = len(rows) - len(pending)
+
+        if workers > 1 and len(pending) > chunk_size:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self.template_path, settings, self.encoding_options())
+            ) as executor:
+                # map() keeps input order and ships rows in chunks
+                rendered = executor.map(
+                    _render_row,
+                    [(rows[i][1], rows[i][2]) for i in pending],
+                    chunksize=chunk_size
+                )
+                for i, path in zip(pending, rendered):
+                    paths[i] = path
+            # Failed renders come back as None; count rendered images only
+            self.cache_stats['misses'] += sum(1 for i in pending if paths[i] is not None)
+        else:
+            for i in pending:
+                paths[i] = self.generate_image(rows[i][1], rows[i][2], *settings)
+
+        metrics.increment('image_cache_hits', self.cache_stats['hits'])
+        metrics.increment('image_cache_misses', self.cache_stats['misses'])
+        self.cache.evict(keep=paths)
+        return {key: path for (key, _, _), path in zip(rows, paths)}
+
     def _hex_to_rgb(self, hex_color):
         """Convert hex color to RGB tuple"""
         hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
\ No newline at end of file
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+# Per-process state for parallel generation: each worker decodes the
+# template and loads the font once, then renders many rows.
+_worker_generator = None
+_worker_settings = None
+
+def _init_worker(template_path, settings, encoding):
+    global _worker_generator, _worker_settings
+    _worker_generator = ImageGenerator(template_path, **encoding)
+    _worker_settings = settings
+
+    font_size, color = settings[0], settings[1]
+    _worker_generator._get_template()
+    _worker_generator._get_font(font_size)
+    _worker_generator._get_color(color)
+
+def _render_row(row):
+    name, date = row
+    return _worker_generator.generate_image(name, date, *_worker_settings)
+
+def _render_row_bytes(row):
+    """Render one row in memory; returns (image_bytes, filename, error)"""
+    name, date = row
+    try:
+        return (*_worker_generator.render_bytes(name, date, *_worker_settings), None)
+    except Exception as e:
+        return None, None, str(e)
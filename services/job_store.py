@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+COLUMNS = (
+    'id', 'send_time', 'recipient', 'subject', 'body', 'image_path',
+    'sender_email', 'password', 'smtp_server', 'smtp_port', 'status',
+    'attempts', 'last_error', 'image_name'
+)
+
+# Statuses of jobs that are still waiting to be sent
+PENDING_STATUSES = ('Scheduled', 'Retrying')
+
+
+class JobStore:
+    def __init__(self, db_path="data/scheduler.db"):
+        """
+        SQLite persistence for scheduled emails
+
+        Args:
+            db_path: Database file (":memory:" for a throwaway store)
+        """
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    send_time REAL NOT NULL,
+                    recipient TEXT NOT NULL,
+                    subject TEXT,
+                    body TEXT,
+                    image_path TEXT,
+                    sender_email TEXT,
+                    password TEXT,
+                    smtp_server TEXT,
+                    smtp_port INTEGER,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    image_name TEXT
+                )
+                """
+            )
+
+            # Databases created before retries were tracked
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            if 'attempts' not in existing:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            if 'last_error' not in existing:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN last_error TEXT")
+            # ... and before attachments kept their readable name
+            if 'image_name' not in existing:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN image_name TEXT")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status_time ON jobs (status, send_time)"
+            )
+
+    def add_many(self, rows):
+        """Insert job rows (dicts keyed by COLUMNS) in one transaction"""
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                ([row[col] for col in COLUMNS] for row in rows)
+            )
+
+    def set_status(self, job_ids, status):
+        """Update the status of one or more jobs"""
+        if isinstance(job_ids, str):
+            job_ids = [job_ids]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE jobs SET status = ? WHERE id = ?",
+                ((status, job_id) for job_id in job_ids)
+            )
+
+    def claim(self, job_ids):
+        """
+        Mark pending jobs as 'Sending' and return the ids this call claimed
+
+        Each update only matches a job that is still pending, so when
+        several schedulers share the database exactly one of them claims
+        a job, and a job cancelled elsewhere is not claimed at all.
+        """
+        placeholders = ", ".join("?" for _ in PENDING_STATUSES)
+        claimed = []
+        with self.lock, self.conn:
+            for job_id in job_ids:
+                cursor = self.conn.execute(
+                    f"UPDATE jobs SET status = 'Sending' WHERE id = ? AND status IN ({placeholders})",
+                    (job_id, *PENDING_STATUSES)
+                )
+                if cursor.rowcount:
+                    claimed.append(job_id)
+        return claimed
+
+    def cancel(self, job_id):
+        """Cancel a job if it is still pending; returns whether it was"""
+        placeholders = ", ".join("?" for _ in PENDING_STATUSES)
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE jobs SET status = 'Cancelled' WHERE id = ? AND status IN ({placeholders})",
+                (job_id, *PENDING_STATUSES)
+            )
+        return cursor.rowcount > 0
+
+    def reschedule(self, rows):
+        """Store new send time, status, attempts and last error for retried jobs"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE jobs SET send_time = ?, status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                ((row['send_time'], row['status'], row['attempts'], row['last_error'], row['id']) for row in rows)
+            )
+
+    def get(self, job_id):
+        """Return one job row as a dict, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def load_by_status(self, *statuses, after_rowid=0):
+        """
+        Return job rows with any of the statuses, ordered by send time
+
+        Rows include their SQLite 'rowid'; pass the largest one seen as
+        ``after_rowid`` to load only rows inserted since.
+        """
+        placeholders = ", ".join("?" for _ in statuses)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT rowid, * FROM jobs WHERE status IN ({placeholders}) AND rowid > ? "
+                "ORDER BY send_time",
+                (*statuses, after_rowid)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
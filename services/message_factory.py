@@ -0,0 +1,142 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+
+from utils.logger import metrics
+
+# Attachment file extension -> MIME image subtype
+IMAGE_SUBTYPES = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg', '.webp': 'webp', '.gif': 'gif'}
+
+
+def image_subtype(filename):
+    """MIME subtype for an image file name (defaults to png)"""
+    return IMAGE_SUBTYPES.get(Path(filename or '').suffix.lower(), 'png')
+
+
+class PartCache:
+    """Thread-safe LRU of encoded MIME parts, bounded by their encoded size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, part, size):
+        if not self.max_bytes or size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = (part, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, old_size) = self.entries.popitem(last=False)
+                self.size -= old_size
+
+
+class MessageFactory:
+    def __init__(self, sender_email, body_cache_bytes=1024 * 1024,
+                 attachment_cache_bytes=64 * 1024 * 1024):
+        """
+        Builds recipient messages from cached, already-encoded parts
+
+        Body and attachment parts are immutable once encoded, so one part
+        object is attached to every message that uses the same text or
+        image bytes; each message only gets its own container and headers.
+        A campaign with an unpersonalized body encodes it once, and an
+        attachment shared by many recipients is base64-encoded once.
+
+        Args:
+            sender_email: From address
+            body_cache_bytes: Memory for encoded bodies (0 = no cache)
+            attachment_cache_bytes: Memory for encoded attachments (0 = no cache)
+        """
+        self.sender_email = sender_email
+        self.bodies = PartCache(body_cache_bytes)
+        self.attachments = PartCache(attachment_cache_bytes)
+
+    def body_part(self, body):
+        """Encoded text/plain part for a body"""
+        part = self.bodies.get(body)
+        if part is None:
+            part = MIMEText(body, 'plain')
+            self.bodies.put(body, part, len(body))
+        else:
+            metrics.increment('mime_parts_reused')
+        return part
+
+    def image_part(self, data, name):
+        """Base64-encoded image part, memoized by content hash and name"""
+        key = (hashlib.sha1(data).digest(), name)
+        part = self.attachments.get(key)
+        if part is None:
+            part = MIMEImage(data, image_subtype(name), name=name)
+            self.attachments.put(key, part, len(data) * 4 // 3)
+        else:
+            metrics.increment('mime_parts_reused')
+        return part
+
+    def file_part(self, path, name=None):
+        """
+        Image part for a file, or None if it does not exist
+
+        Files are keyed by path, size, mtime and attachment name, so a
+        cached part is reused without reading or hashing the file again.
+        The attachment is called ``name`` (default: the file name).
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        name = name or Path(path).name
+        key = (str(path), stat.st_size, stat.st_mtime_ns, name)
+        part = self.attachments.get(key)
+        if part is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            part = MIMEImage(data, image_subtype(name), name=name)
+            self.attachments.put(key, part, len(data) * 4 // 3)
+        else:
+            metrics.increment('mime_parts_reused')
+        return part
+
+    def build(self, recipient, subject, body, image_path=None,
+              image_data=None, image_name=None):
+        """
+        Build the MIME message for one recipient
+
+        The attachment is either read from ``image_path`` or taken as
+        in-memory ``image_data`` bytes; either way it is named
+        ``image_name`` when given. Its MIME subtype follows the file
+        extension (png, jpeg, webp).
+        """
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email
+        msg['To'] = recipient
+        msg['Subject'] = subject
+
+        msg.attach(self.body_part(body))
+
+        if image_data is not None:
+            msg.attach(self.image_part(image_data, image_name or 'image.png'))
+        elif image_path:
+            part = self.file_part(image_path, image_name)
+            if part is not None:
+                msg.attach(part)
+
+        return msg
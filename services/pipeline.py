@@ -0,0 +1,168 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue, Full
+
+from services.email_sender import PERMANENT, make_result
+from services.image_generator import _init_worker, _render_row_bytes
+
+# Marks the end of the render stream
+_DONE = object()
+
+
+def stream_campaign(generator, sender, jobs, render_settings, batch_size=50,
+                    queue_size=4, workers=None, progress_callback=None,
+                    journal=None, campaign_id=None, total=None, render_workers=1):
+    """
+    Render images in memory and send them, overlapping the two stages
+
+    A producer thread renders each batch of jobs to PNG bytes and puts it on
+    a bounded queue while the calling thread sends the previous batch, so at
+    most ``(queue_size + 2) * batch_size`` images are held in memory at once
+    and nothing is written to disk. With ``render_workers`` > 1 the images of
+    a batch are rendered by that many worker processes (as in
+    ImageGenerator.generate_batch) and only their bytes come back.
+
+    Args:
+        generator: ImageGenerator for the template
+        sender: EmailSender used to send each batch
+        jobs: Iterable of dicts with 'recipient', 'subject', 'body',
+            'name' and 'date' (the text drawn on the image)
+        render_settings: Dict of font_size, color, name_pos, date_pos
+        batch_size: Jobs rendered and sent together
+        queue_size: Rendered batches allowed to wait for sending
+        workers: Send workers per batch (see EmailSender.send_many)
+        progress_callback: Called as progress_callback(done, total, result);
+            total is None when the job count is unknown
+        journal, campaign_id: Optional SendJournal and campaign; already
+            sent jobs are neither rendered nor sent again
+        total: Job count for progress reports when jobs is a generator
+        render_workers: Render processes (1 renders on the producer thread)
+
+    Returns:
+        List of result dicts in job order
+    """
+    if total is None and hasattr(jobs, '__len__'):
+        total = len(jobs)
+    rendered = Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item):
+        # Give up if the consumer has stopped, instead of blocking forever
+        while not stop.is_set():
+            try:
+                rendered.put(item, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    sent_keys = journal.sent_keys(campaign_id) if journal else ()
+
+    def render(job):
+        try:
+            job['image_data'], job['image_name'] = generator.render_bytes(
+                job['name'], job['date'], **render_settings
+            )
+        except Exception as e:
+            job['render_error'] = str(e)
+
+    def render_batch(batch, executor):
+        # Jobs journaled earlier are reported as skipped by send_many
+        todo = [job for job in batch if 'image_data' not in job]
+        if executor:
+            try:
+                images = executor.map(
+                    _render_row_bytes,
+                    [(job['name'], job['date']) for job in todo],
+                    chunksize=max(1, len(todo) // render_workers)
+                )
+                for job, (data, name, error) in zip(todo, images):
+                    if error is None:
+                        job['image_data'], job['image_name'] = data, name
+                    else:
+                        job['render_error'] = error
+            except Exception as e:
+                # A broken pool (e.g. the template failed to load in a worker)
+                for job in todo:
+                    if 'image_data' not in job:
+                        job['render_error'] = str(e) or e.__class__.__name__
+        else:
+            for job in todo:
+                render(job)
+
+    def produce():
+        executor = None
+        batch = []
+        try:
+            if render_workers > 1:
+                settings = (
+                    render_settings.get('font_size', 40),
+                    render_settings.get('color', "#000000"),
+                    render_settings.get('name_pos', (100, 100)),
+                    render_settings.get('date_pos', (100, 200))
+                )
+                executor = ProcessPoolExecutor(
+                    max_workers=render_workers,
+                    initializer=_init_worker,
+                    initargs=(generator.template_path, settings, generator.encoding_options())
+                )
+
+            for job in jobs:
+                job = dict(job)
+                if job.get('key', job['recipient']) in sent_keys:
+                    # send_many reports it as skipped; no need to render
+                    job['image_data'], job['image_name'] = b'', None
+                batch.append(job)
+
+                if len(batch) >= batch_size:
+                    render_batch(batch, executor)
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch:
+                render_batch(batch, executor)
+                put(batch)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    results = []
+    try:
+        while True:
+            batch = rendered.get()
+            if batch is _DONE:
+                break
+
+            failed = [job for job in batch if 'render_error' in job]
+            ready = [job for job in batch if 'render_error' not in job]
+            offset = len(results)
+
+            def on_progress(done, batch_total, result):
+                if progress_callback:
+                    progress_callback(offset + done, total, result)
+
+            batch_results = sender.send_many(ready, workers, on_progress, journal, campaign_id) if ready else []
+
+            # Put render failures back in job order
+            sent = iter(batch_results)
+            for job in batch:
+                if 'render_error' in job:
+                    results.append(make_result(
+                        job['recipient'],
+                        PERMANENT,
+                        f"Image render failed: {job['render_error']}"
+                    ))
+                else:
+                    results.append(next(sent))
+
+            if failed and progress_callback:
+                progress_callback(len(results), total, results[-1])
+    finally:
+        stop.set()
+        producer.join()
+
+    return results
@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        Thread-safe token bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available, then take them"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(smtp_server, rate, account=None):
+    """
+    Return the shared token bucket for an SMTP server
+
+    All senders talking to the same server share one bucket, so parallel
+    workers together stay under the server's messages/sec limit. Pass
+    ``account`` for limits that apply per login rather than per server.
+    Returns None when ``rate`` is falsy (no limit).
+    """
+    if not rate:
+        return None
+
+    key = (smtp_server, account, float(rate))
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(rate)
+        return _buckets[key]
@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from services.email_sender import SENT, PERMANENT, TRANSIENT, THROTTLE_CODES, THROTTLE_PAUSE, make_result
+
+
+def backoff_delay(attempt, base_delay=30, max_delay=900, code=None):
+    """
+    Jittered exponential backoff for the given retry attempt (1-based)
+
+    The delay doubles each attempt up to ``max_delay`` and is spread over
+    50-150% so retries from one campaign do not arrive in lockstep. A
+    throttling reply never retries sooner than THROTTLE_PAUSE.
+    """
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    delay *= random.uniform(0.5, 1.5)
+    if code in THROTTLE_CODES:
+        delay = max(delay, THROTTLE_PAUSE)
+    return delay
+
+
+class RetryQueue:
+    def __init__(self, sender, base_delay=30, max_delay=900, max_attempts=5,
+                 retry_budget=None, journal=None, campaign_id=None, on_result=None,
+                 prepare=None):
+        """
+        Background retries for transient send failures
+
+        Args:
+            sender: EmailSender used for retries (closed when the queue is)
+            base_delay: Delay before the first retry, in seconds
+            max_delay: Upper bound on one backoff delay
+            max_attempts: Retries allowed per job
+            retry_budget: Total retries allowed for the campaign (None = no limit)
+            journal, campaign_id: Optional SendJournal to record retried sends
+            on_result: Called as on_result(job, result) with the final result
+                of every job handed to the queue
+            prepare: Called as prepare(job) on the retry thread before a
+                job's first retry; returns the job to send (e.g. with its
+                image rendered). A failure here is final.
+        """
+        self.sender = sender
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget
+        self.journal = journal
+        self.campaign_id = campaign_id
+        self.on_result = on_result
+        self.prepare = prepare
+
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.retries_used = 0
+        self.stats = {'retrying': 0, 'sent': 0, 'failed': 0}
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, job, result, attempt=1):
+        """
+        Queue a job whose send failed
+
+        Returns:
+            True if a retry was scheduled, False if the failure is final
+            (permanent error, attempts or campaign budget exhausted)
+        """
+        with self.condition:
+            allowed = (
+                result['status'] == TRANSIENT
+                and attempt <= self.max_attempts
+                and (self.retry_budget is None or self.retries_used < self.retry_budget)
+                and not self.closed
+            )
+            if allowed:
+                self.retries_used += 1
+                due = time.monotonic() + backoff_delay(attempt, self.base_delay, self.max_delay, result.get('code'))
+                heapq.heappush(self.heap, (due, next(self.counter), job, attempt))
+                self.stats['retrying'] += 1
+                self.condition.notify()
+                return True
+
+        self._finish(job, result)
+        return False
+
+    def pending(self):
+        """Number of jobs waiting for or in a retry"""
+        with self.condition:
+            return len(self.heap) + self.in_flight
+
+    def _finish(self, job, result):
+        with self.condition:
+            self.stats['sent' if result['status'] == SENT else 'failed'] += 1
+            self.condition.notify_all()
+        if self.on_result:
+            self.on_result(job, result)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.closed:
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    delay = self.heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(delay)
+                if self.closed:
+                    return
+                _, _, job, attempt = heapq.heappop(self.heap)
+                self.stats['retrying'] -= 1
+                self.in_flight += 1
+
+            result = None
+            if self.prepare and attempt == 1:
+                try:
+                    job = self.prepare(job)
+                except Exception as e:
+                    result = make_result(job['recipient'], PERMANENT, f"Could not prepare retry: {e}")
+            if result is None:
+                result = self.sender.send_job(job)
+
+            if result['status'] == SENT:
+                if self.journal:
+                    self.journal.record(self.campaign_id, job.get('key', job['recipient']), job['recipient'])
+                self._finish(job, result)
+            else:
+                self.submit(job, result, attempt + 1)
+
+            with self.condition:
+                self.in_flight -= 1
+                self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until every queued retry has finished; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.heap or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def close(self):
+        """Stop retrying; jobs still queued are dropped"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.sender.close()
@@ -1,21 +1,195 @@
-import schedule
+import heapq
+import itertools
 import threading
 import time
-from datetime import datetime
-from services.email_sender import EmailSender
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from services.email_sender import EmailSender, TRANSIENT, make_result
+from services.job_store import JobStore, PENDING_STATUSES
+from services.retry_queue import backoff_delay
 import uuid
 
+# Upper bound on one sleep, so wall-clock changes are picked up
+MAX_WAIT = 60
+
+# Seconds between checks for jobs another process added to the database
+# (e.g. 'smartmailer run' with a schedule time)
+POLL_INTERVAL = 60
+
+# Largest number of due jobs handed to one send_many call
+MAX_BATCH_SIZE = 500
+
+
+def make_job_rows(send_time, jobs, sender_email, password, smtp_server, smtp_port):
+    """
+    JobStore rows for emails scheduled at the same time from one account
+
+    Lets a process queue jobs with JobStore.add_many without loading or
+    starting a scheduler; the scheduler that owns the database picks them
+    up within POLL_INTERVAL seconds.
+    """
+    timestamp = send_time.timestamp()
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'send_time': timestamp,
+            'recipient': item['recipient'],
+            'subject': item['subject'],
+            'body': item['body'],
+            'image_path': item.get('image_path'),
+            'image_name': item.get('image_name'),
+            'sender_email': sender_email,
+            'password': password,
+            'smtp_server': smtp_server,
+            'smtp_port': smtp_port,
+            'status': 'Scheduled',
+            'attempts': 0,
+            'last_error': None
+        }
+        for item in jobs
+    ]
+
 class EmailScheduler:
-    def __init__(self):
+    def __init__(self, db_path="data/scheduler.db", send_workers=4, rate_limit=None,
+                 max_concurrent_batches=2, max_attempts=5, retry_base_delay=30):
+        """
+        Durable one-shot email scheduler
+
+        Jobs are kept in a min-heap keyed by their exact send time; the
+        background thread sleeps until the earliest one is due. Every job is
+        also written to SQLite, so pending sends resume after a restart.
+
+        Jobs that come due together are grouped by sender account and sent
+        as one batch over shared SMTP sessions on a dispatch pool, so a large
+        campaign does not block the scheduler thread.
+
+        A due job is claimed in the database (status 'Sending') before it is
+        sent, so schedulers in several processes sharing the file (the app
+        and 'smartmailer scheduler') each send a job at most once, and a job
+        cancelled in one of them is not sent by another. Jobs that were
+        'Sending' when a process died are not sent again on restart.
+
+        Args:
+            db_path: SQLite file for persisted jobs
+            send_workers: Concurrent SMTP sessions per batch
+            rate_limit: Messages/sec per SMTP server (None = unlimited)
+            max_concurrent_batches: Batches sent at the same time
+            max_attempts: Retries for a job after transient SMTP errors;
+                a job waiting for a retry has the status 'Retrying'
+            retry_base_delay: First retry delay in seconds (doubles, jittered)
+        """
         self.jobs = {}
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
         self.running = False
         self.thread = None
-        
-    def schedule_email(self, send_time, recipient, subject, body, image_path, 
+        self.senders = {}
+        self.senders_lock = threading.Lock()
+        self.send_workers = send_workers
+        self.rate_limit = rate_limit
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.dispatcher = None
+        self.next_poll = time.monotonic() + POLL_INTERVAL
+        self.last_rowid = 0
+
+        self.store = JobStore(db_path)
+        self._load_pending()
+
+    def _load_pending(self):
+        """Re-queue jobs that were still pending when the app stopped"""
+        rows = self.store.load_by_status(*PENDING_STATUSES)
+        with self.condition:
+            for row in rows:
+                self._push(self._job_from_row(row))
+                self.last_rowid = max(self.last_rowid, row['rowid'])
+
+        if rows:
+            self._start_scheduler()
+
+    def _load_new(self):
+        """Queue pending jobs added to the database by another process; caller holds the condition"""
+        for row in self.store.load_by_status(*PENDING_STATUSES, after_rowid=self.last_rowid):
+            if row['id'] not in self.jobs:
+                self._push(self._job_from_row(row))
+            self.last_rowid = max(self.last_rowid, row['rowid'])
+        self.next_poll = time.monotonic() + POLL_INTERVAL
+
+    def _job_from_row(self, row):
+        return {
+            'id': row['id'],
+            'time': datetime.fromtimestamp(row['send_time']),
+            'recipient': row['recipient'],
+            'subject': row['subject'],
+            'body': row['body'],
+            'image_path': row['image_path'],
+            'image_name': row.get('image_name'),
+            'account': (row['sender_email'], row['password'], row['smtp_server'], row['smtp_port']),
+            'status': row['status'],
+            'attempts': row.get('attempts', 0),
+            'last_error': row.get('last_error')
+        }
+
+    def _push(self, job):
+        """Index a job and add it to the heap; caller holds the condition"""
+        self.jobs[job['id']] = job
+        heapq.heappush(self.heap, (job['time'].timestamp(), next(self.counter), job['id']))
+
+    def _get_sender(self, sender_email, password, smtp_server, smtp_port):
+        """Return a shared, pooled sender for the given account"""
+        key = (sender_email, password, smtp_server, smtp_port)
+        with self.senders_lock:
+            if key not in self.senders:
+                self.senders[key] = EmailSender(
+                    sender_email,
+                    password,
+                    smtp_server,
+                    smtp_port,
+                    pool_size=self.send_workers,
+                    rate_limit=self.rate_limit
+                )
+            return self.senders[key]
+
+    def schedule_emails(self, send_time, jobs, sender_email, password, smtp_server, smtp_port):
+        """
+        Schedule many emails for the same account in one transaction
+
+        Args:
+            send_time: datetime object for when to send
+            jobs: Iterable of dicts with 'recipient', 'subject', 'body',
+                'image_path' and optional 'image_name' (attachment name)
+            sender_email: Sender's email
+            password: Sender's password
+            smtp_server: SMTP server
+            smtp_port: SMTP port
+
+        Returns:
+            List of job ids. Jobs whose time has passed are sent right away.
+        """
+        rows = make_job_rows(send_time, jobs, sender_email, password, smtp_server, smtp_port)
+        new_jobs = [self._job_from_row(row) for row in rows]
+
+        self.store.add_many(rows)
+
+        with self.condition:
+            for job in new_jobs:
+                self._push(job)
+            self.condition.notify()
+
+        # Start scheduler if not running
+        if not self.running:
+            self._start_scheduler()
+
+        return [job['id'] for job in new_jobs]
+
+    def schedule_email(self, send_time, recipient, subject, body, image_path,
                       sender_email, password, smtp_server, smtp_port):
         """
         Schedule an email to be sent at a specific time
-        
+
         Args:
             send_time: datetime object for when to send
             recipient: Recipient email
@@ -26,72 +200,195 @@ class EmailScheduler:
             password: Sender's password
             smtp_server: SMTP server
             smtp_port: SMTP port
+
+        Returns:
+            Job id
         """
-        job_id = str(uuid.uuid4())
-        
-        # Create job function
-        def send_job():
-            sender = EmailSender(sender_email, password, smtp_server, smtp_port)
-            success = sender.send_email(recipient, subject, body, image_path)
-            
-            if success:
-                self.jobs[job_id]['status'] = 'Sent'
-            else:
-                self.jobs[job_id]['status'] = 'Failed'
-        
-        # Calculate time until send
-        now = datetime.now()
-        if send_time > now:
-            # Schedule the job
-            schedule_time_str = send_time.strftime('%H:%M')
-            schedule.every().day.at(schedule_time_str).do(send_job).tag(job_id)
-            
-            # Store job info
-            self.jobs[job_id] = {
-                'id': job_id,
-                'time': send_time,
-                'recipient': recipient,
-                'subject': subject,
-                'status': 'Scheduled'
-            }
-            
-            # Start scheduler if not running
-            if not self.running:
-                self._start_scheduler()
-            
-            return job_id
-        else:
-            # Send immediately if time has passed
-            sender = EmailSender(sender_email, password, smtp_server, smtp_port)
-            sender.send_email(recipient, subject, body, image_path)
-            return None
-    
+        job = {'recipient': recipient, 'subject': subject, 'body': body, 'image_path': image_path}
+        return self.schedule_emails(send_time, [job], sender_email, password, smtp_server, smtp_port)[0]
+
     def cancel_email(self, job_id):
-        """Cancel a scheduled email"""
-        if job_id in self.jobs:
-            schedule.clear(job_id)
-            self.jobs[job_id]['status'] = 'Cancelled'
-            return True
-        return False
-    
-    def get_scheduled_emails(self):
-        """Get list of all scheduled emails"""
-        return [job for job in self.jobs.values() if job['status'] == 'Scheduled']
-    
+        """Cancel a scheduled email, unless it is already being sent"""
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job and job['status'] not in PENDING_STATUSES:
+                return False
+
+        # The database decides: another process may have claimed the job
+        cancelled = self.store.cancel(job_id)
+        with self.condition:
+            if job:
+                if cancelled:
+                    job['status'] = 'Cancelled'
+                # Finished jobs live only in the store; the heap entry is
+                # skipped when it comes due
+                self.jobs.pop(job_id, None)
+        return cancelled
+
+    def get_status(self, job_id):
+        """Return the status of a job, or None if it is unknown; finished jobs are read from the store"""
+        job = self.jobs.get(job_id)
+        if job:
+            return job['status']
+        row = self.store.get(job_id)
+        return row['status'] if row else None
+
+    def get_scheduled_emails(self, offset=0, limit=None):
+        """
+        Get scheduled emails, including those waiting for a retry
+
+        Args:
+            offset: Number of emails to skip, in send time order
+            limit: Maximum number of emails to return (None = all)
+
+        Returns:
+            List of job dicts ordered by send time
+        """
+        with self.condition:
+            pending = [job for job in self.jobs.values() if job['status'] in PENDING_STATUSES]
+        pending.sort(key=lambda job: job['time'])
+        return pending[offset:None if limit is None else offset + limit]
+
+    def count_scheduled(self):
+        """Number of emails still waiting to be sent"""
+        with self.condition:
+            return sum(1 for job in self.jobs.values() if job['status'] in PENDING_STATUSES)
+
+    def _next_due(self):
+        """Block until jobs are due and return all of them, or None once stopped"""
+        with self.condition:
+            while self.running:
+                poll = self.next_poll - time.monotonic()
+                if poll <= 0:
+                    self._load_new()
+                    continue
+
+                if not self.heap:
+                    self.condition.wait(poll)
+                    continue
+
+                delay = self.heap[0][0] - time.time()
+                if delay > 0:
+                    self.condition.wait(min(delay, MAX_WAIT, poll))
+                    continue
+
+                # Pop every job that is due now, not just the first one
+                now = time.time()
+                due = []
+                while self.heap and self.heap[0][0] <= now:
+                    _, _, job_id = heapq.heappop(self.heap)
+                    job = self.jobs.get(job_id)
+                    if job and job['status'] in PENDING_STATUSES:
+                        job['status'] = 'Sending'
+                        due.append(job)
+                if due:
+                    return due
+        return None
+
+    def _claim(self, jobs):
+        """Return the due jobs this scheduler claimed; the rest are dropped"""
+        claimed = set(self.store.claim([job['id'] for job in jobs]))
+        with self.condition:
+            for job in jobs:
+                if job['id'] not in claimed:
+                    # Sent or cancelled by another process
+                    self.jobs.pop(job['id'], None)
+        return [job for job in jobs if job['id'] in claimed]
+
+    def _dispatch(self, jobs):
+        """Group due jobs by account and queue each group as a batch"""
+        groups = defaultdict(list)
+        for job in jobs:
+            groups[job['account']].append(job)
+
+        for account, group in groups.items():
+            for i in range(0, len(group), MAX_BATCH_SIZE):
+                self.dispatcher.submit(self._send_batch, account, group[i:i + MAX_BATCH_SIZE])
+
+    def _send_batch(self, account, jobs):
+        """Send one batch over the account's shared pool and record each status"""
+        try:
+            sender = self._get_sender(*account)
+            results = sender.send_many(jobs, self.send_workers)
+        except Exception as e:
+            print(f"❌ Error sending scheduled batch: {str(e)}")
+            results = [make_result(job['recipient'], TRANSIENT, str(e)) for job in jobs]
+
+        by_status = defaultdict(list)
+        retries = []
+        for job, result in zip(jobs, results):
+            if result['status'] == TRANSIENT and job['attempts'] < self.max_attempts:
+                # Back off and put the job back on the heap
+                job['attempts'] += 1
+                job['last_error'] = result['error']
+                delay = backoff_delay(job['attempts'], self.retry_base_delay, code=result['code'])
+                job['time'] = datetime.now() + timedelta(seconds=delay)
+                job['status'] = 'Retrying'
+                retries.append(job)
+            else:
+                job['status'] = 'Sent' if result['success'] else 'Failed'
+                job['last_error'] = result['error']
+                by_status[job['status']].append(job['id'])
+
+        for status, job_ids in by_status.items():
+            self.store.set_status(job_ids, status)
+
+        # Finished jobs are only kept in the store (see get_status)
+        with self.condition:
+            for job_ids in by_status.values():
+                for job_id in job_ids:
+                    self.jobs.pop(job_id, None)
+
+        if retries:
+            self.store.reschedule([
+                {
+                    'id': job['id'],
+                    'send_time': job['time'].timestamp(),
+                    'status': job['status'],
+                    'attempts': job['attempts'],
+                    'last_error': job['last_error']
+                }
+                for job in retries
+            ])
+            with self.condition:
+                for job in retries:
+                    self._push(job)
+                self.condition.notify()
+
+    def start(self):
+        """Start delivering due jobs in the background"""
+        self._start_scheduler()
+
     def _start_scheduler(self):
         """Start the background scheduler thread"""
-        self.running = True
-        
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+            self.dispatcher = ThreadPoolExecutor(max_workers=self.max_concurrent_batches)
+
         def run_scheduler():
-            while self.running:
-                schedule.run_pending()
-                time.sleep(1)
-        
+            while True:
+                jobs = self._next_due()
+                if jobs is None:
+                    break
+                self._dispatch(self._claim(jobs))
+
         self.thread = threading.Thread(target=run_scheduler, daemon=True)
         self.thread.start()
-    
+
     def stop_scheduler(self):
         """Stop the scheduler"""
-        self.running = False
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
         if self.thread:
-            self.thread.join()
\ No newline at end of file
+            self.thread.join()
+        if self.dispatcher:
+            self.dispatcher.shutdown(wait=True)
+            self.dispatcher = None
+
+        with self.senders_lock:
+            for sender in self.senders.values():
+                sender.close()
+            self.senders.clear()
@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from queue import Queue, Empty
+
+
+class SendJournal:
+    def __init__(self, db_path="data/send_journal.db", flush_interval=0.5, flush_size=500):
+        """
+        Append-only record of messages the SMTP server has accepted
+
+        Records are queued and committed by a writer thread in groups (one
+        fsync per group), so journaling keeps up with thousands of messages
+        per minute. On a crash at most the last ``flush_interval`` seconds of
+        accepted messages are missing from the journal and may be sent again
+        on resume.
+
+        Args:
+            db_path: SQLite file for the journal
+            flush_interval: Maximum seconds a record waits before commit
+            flush_size: Commit as soon as this many records are queued
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=FULL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sent (
+                    campaign_id TEXT NOT NULL,
+                    message_key TEXT NOT NULL,
+                    recipient TEXT,
+                    sent_at REAL NOT NULL,
+                    PRIMARY KEY (campaign_id, message_key)
+                ) WITHOUT ROWID
+                """
+            )
+
+        # campaign_id -> set of keys, loaded once and kept current by record()
+        self._sent = {}
+        self._pending = Queue()
+        self._flushed = threading.Condition()
+        self._queued = 0
+        self._committed = 0
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def sent_keys(self, campaign_id):
+        """Keys already sent for a campaign"""
+        with self.lock:
+            if campaign_id not in self._sent:
+                rows = self.conn.execute(
+                    "SELECT message_key FROM sent WHERE campaign_id = ?", (campaign_id,)
+                ).fetchall()
+                self._sent[campaign_id] = {row[0] for row in rows}
+            return self._sent[campaign_id]
+
+    def is_sent(self, campaign_id, key):
+        return key in self.sent_keys(campaign_id)
+
+    def record(self, campaign_id, key, recipient=None):
+        """Queue a record that a message was accepted by the server"""
+        keys = self.sent_keys(campaign_id)
+        with self.lock:
+            keys.add(key)
+        with self._flushed:
+            self._queued += 1
+        self._pending.put((campaign_id, key, recipient, time.time()))
+
+    def _write_loop(self):
+        while True:
+            try:
+                first = self._pending.get(timeout=self.flush_interval)
+            except Empty:
+                if self._closed:
+                    return
+                continue
+
+            # Group everything that arrives within the flush window
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except Empty:
+                    break
+
+            try:
+                with self.lock, self.conn:
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO sent (campaign_id, message_key, recipient, sent_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        batch
+                    )
+            except Exception as e:
+                print(f"❌ Error writing send journal: {str(e)}")
+
+            with self._flushed:
+                self._committed += len(batch)
+                self._flushed.notify_all()
+
+    def flush(self):
+        """Block until every queued record is committed"""
+        with self._flushed:
+            target = self._queued
+            while self._committed < target:
+                self._flushed.wait()
+
+    def close(self):
+        self.flush()
+        self._closed = True
+        self._writer.join()
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
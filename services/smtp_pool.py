@@ -0,0 +1,184 @@
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+
+from utils.logger import metrics
+
+# SMTP reply codes that mean the server is closing or refusing the session;
+# the connection is dropped and the message retried on a fresh one.
+RECONNECT_CODES = {421}
+
+
+class PooledConnection:
+    """A logged-in SMTP session plus the bookkeeping the pool needs"""
+
+    def __init__(self, server):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    def __init__(self, sender_email, password, smtp_server, smtp_port,
+                 max_size=4, max_messages_per_connection=100,
+                 keepalive_interval=30, timeout=30, use_tls=True):
+        """
+        Bounded pool of authenticated SMTP sessions
+
+        Args:
+            sender_email: Login user
+            password: Login password
+            smtp_server: SMTP server host
+            smtp_port: SMTP server port
+            max_size: Maximum number of open connections
+            max_messages_per_connection: Recycle a connection after this many messages
+            keepalive_interval: Idle seconds after which a NOOP health check is run
+            timeout: Socket timeout in seconds
+            use_tls: Upgrade the session with STARTTLS before logging in
+        """
+        self.sender_email = sender_email
+        self.password = password
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.keepalive_interval = keepalive_interval
+        self.timeout = timeout
+        self.use_tls = use_tls
+
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    def _connect(self):
+        """Open, secure and authenticate a new SMTP session"""
+        with metrics.timer('connect'):
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                with metrics.timer('starttls'):
+                    server.starttls()
+            if self.password:
+                with metrics.timer('login'):
+                    server.login(self.sender_email, self.password)
+        except Exception:
+            self._quit(server)
+            raise
+        metrics.increment('smtp_connections')
+        return PooledConnection(server)
+
+    def _quit(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn):
+        """Check an idle connection with NOOP before handing it out again"""
+        if time.monotonic() - conn.last_used < self.keepalive_interval:
+            return True
+        try:
+            code, _ = conn.server.noop()
+            return code == 250
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Take a healthy connection from the pool, opening one if needed"""
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed")
+
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except Empty:
+                    conn = self._connect()
+                    break
+                if self._is_healthy(conn):
+                    break
+                self._discard(conn)
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, or close it if it should not be reused"""
+        conn.last_used = time.monotonic()
+        if (discard or self._closed
+                or conn.messages_sent >= self.max_messages_per_connection):
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def _discard(self, conn):
+        self._quit(conn.server)
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection"""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def send_message(self, msg, retries=1):
+        """
+        Send a message over a pooled connection
+
+        A server-side disconnect or a 421 reply drops the connection and the
+        message is retried on a fresh one, up to ``retries`` times.
+        """
+        attempt = 0
+        while True:
+            conn = self.acquire()
+            start = time.perf_counter()
+            try:
+                conn.server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.release(conn, discard=True)
+                if attempt >= retries:
+                    raise
+            except smtplib.SMTPResponseException as e:
+                reconnect = e.smtp_code in RECONNECT_CODES
+                self.release(conn, discard=reconnect)
+                if not reconnect or attempt >= retries:
+                    raise
+            except smtplib.SMTPRecipientsRefused as e:
+                # smtplib has reset the session after an ordinary refusal, so
+                # it is reusable; a 421 means the server is closing it
+                closing = any(code in RECONNECT_CODES for code, _ in e.recipients.values())
+                self.release(conn, discard=closing)
+                raise
+            except Exception:
+                self.release(conn, discard=True)
+                raise
+            else:
+                metrics.observe('send', time.perf_counter() - start)
+                conn.messages_sent += 1
+                self.release(conn)
+                return
+            attempt += 1
+
+    def close(self):
+        """Close all idle connections; in-use ones are closed on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+
+class TextTileCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        LRU of rasterized text, bounded by tile memory
+
+        Each unique (text, font, color) is drawn once into a tight RGBA
+        tile; renders then alpha-composite the tile onto the template
+        instead of rasterizing glyphs again. Names and dates repeat a lot
+        in a campaign, so most draws become a cached blit.
+
+        Args:
+            max_bytes: Memory for cached tiles (4 bytes per pixel)
+        """
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def rasterize(text, font, color):
+        """
+        Draw text into a tile
+
+        Returns:
+            (tile, (dx, dy)) where the offset places the tile relative to
+            the position draw.text would have been given
+        """
+        # ImageDraw.textbbox, unlike font.getbbox, lays out multiline text
+        # the way draw.text does
+        left, top, right, bottom = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+        size = (max(1, right - left), max(1, bottom - top))
+
+        mask = Image.new('L', size, 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+
+        tile = Image.new('RGBA', size, tuple(color[:3]) + (255,))
+        tile.putalpha(mask)
+        return tile, (left, top)
+
+    def get(self, text, font, font_key, color):
+        """Cached tile and offset for text drawn with a font (font_key identifies it)"""
+        key = (text, font_key, color)
+        with self.lock:
+            entry = self.tiles.get(key)
+            if entry is not None:
+                self.tiles.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+
+        tile, offset = self.rasterize(text, font, color)
+        nbytes = tile.width * tile.height * 4
+        if nbytes <= self.max_bytes:
+            with self.lock:
+                if key not in self.tiles:
+                    self.tiles[key] = (tile, offset, nbytes)
+                    self.size += nbytes
+                    while self.size > self.max_bytes:
+                        _, (_, _, old_bytes) = self.tiles.popitem(last=False)
+                        self.size -= old_bytes
+        return tile, offset
+
+    def draw(self, img, position, text, font, font_key, color):
+        """Composite cached text onto an RGBA image, as draw.text(position, ...) would"""
+        tile, (dx, dy) = self.get(text, font, font_key, color)
+        x, y = position[0] + dx, position[1] + dy
+
+        # Entirely off the canvas: nothing to draw (draw.text accepts this too)
+        if x + tile.width <= 0 or y + tile.height <= 0 or x >= img.width or y >= img.height:
+            return
+
+        # alpha_composite needs a non-negative destination; clip the tile instead
+        if x < 0 or y < 0:
+            tile = tile.crop((max(0, -x), max(0, -y), tile.width, tile.height))
+            x, y = max(0, x), max(0, y)
+        img.alpha_composite(tile, (x, y))
@@ -0,0 +1,305 @@
+"""
+Headless campaign runner
+
+Usage:
+    python -m smartmailer run campaign.yaml
+    python -m smartmailer scheduler
+
+A campaign file (YAML or JSON) looks like:
+
+    recipients: data/uploads/list.xlsx
+    template: assets/templates/card.png
+    send_mode: Combine Days          # or Separate Days
+    subject: Your Personalized Image
+    body: |
+      Dear {name},
+
+      Please find your personalized image attached.
+    image:                           # optional; defaults from config/config.json
+      format: jpeg                   # png, png8, jpeg or webp
+      quality: 85
+      max_dimension: 1600
+    text:
+      font_size: 40
+      color: "#000000"
+      name_pos: [100, 100]
+      date_pos: [100, 200]
+    schedule: "2026-10-20 09:00"     # optional; omit to send now
+    campaign_id: spring-2026         # optional; defaults to the file name
+    parallelism:
+      send_workers: 4
+      rate_limit: 5
+      batch_size: 50
+      retry_budget: 100              # optional; retries allowed for the campaign
+
+SMTP credentials come from config/config.json unless the campaign has an
+``smtp`` section with sender_email, sender_password, smtp_server and
+smtp_port. Streamlit is never imported.
+
+To spread a campaign over several accounts or relays, list them under
+``accounts`` (same keys as ``smtp`` plus optional rate_limit and
+daily_quota); extra accounts saved in config/config.json are used otherwise.
+
+Sent messages are journaled per campaign ID, so re-running an interrupted
+campaign only sends to the recipients that were not reached. Temporary SMTP
+errors (4xx replies, dropped connections) are retried with backoff before
+the runner exits.
+
+Pass ``--metrics run.json`` (or ``run.prom`` for Prometheus text) to save
+per-stage timings, counters and error classes for the run.
+"""
+import argparse
+import json
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config.settings import Settings
+from utils.logger import metrics
+
+
+def load_campaign(path):
+    """Read a campaign file (YAML needs PyYAML, JSON always works)"""
+    path = Path(path)
+    with open(path, 'r') as f:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("PyYAML is required for YAML campaign files (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def smtp_account(campaign, settings):
+    smtp = campaign.get('smtp', {})
+    return (
+        smtp.get('sender_email', settings.SENDER_EMAIL),
+        smtp.get('sender_password', settings.SENDER_PASSWORD),
+        smtp.get('smtp_server', settings.SMTP_SERVER),
+        int(smtp.get('smtp_port', settings.SMTP_PORT))
+    )
+
+
+def make_sender(campaign, settings, account, pool_size, rate_limit):
+    """EmailSender for one account, or an AccountPool for several / with quotas"""
+    from services.account_pool import AccountPool
+    from services.email_sender import EmailSender
+
+    accounts = campaign.get('accounts')
+    if not accounts and (settings.SENDER_ACCOUNTS or settings.DAILY_QUOTA) and not campaign.get('smtp'):
+        accounts = settings.sender_accounts()
+    if not accounts:
+        return EmailSender(
+            *account,
+            pool_size=pool_size,
+            max_messages_per_connection=settings.MAX_MESSAGES_PER_CONNECTION,
+            rate_limit=rate_limit
+        )
+    return AccountPool(
+        accounts,
+        pool_size=pool_size,
+        max_messages_per_connection=settings.MAX_MESSAGES_PER_CONNECTION
+    )
+
+
+def render_settings(campaign):
+    text = campaign.get('text', {})
+    return {
+        'font_size': int(text.get('font_size', 40)),
+        'color': text.get('color', '#000000'),
+        'name_pos': tuple(text.get('name_pos', (100, 100))),
+        'date_pos': tuple(text.get('date_pos', (100, 200)))
+    }
+
+
+def image_encoding(campaign, settings):
+    image = campaign.get('image', {})
+    encoding = settings.image_encoding()
+    encoding.update({
+        'encoding': image.get('format', encoding['encoding']),
+        'quality': int(image.get('quality', encoding['quality'])),
+        'max_dimension': image.get('max_dimension', encoding['max_dimension']) or None,
+        'flatten': bool(image.get('flatten', encoding['flatten']))
+    })
+    return encoding
+
+
+def print_progress(done, total, result):
+    status = 'sent' if result['success'] else f"FAILED ({result['error']})"
+    total = total if total is not None else '?'
+    print(f"[{done}/{total}] {result['recipient']}: {status}", flush=True)
+
+
+def run_campaign(args):
+    from services.account_pool import AccountPool
+    from services.campaign import CampaignPlan
+    from services.email_sender import TRANSIENT
+    from services.excel_service import import_recipients, load_recipients
+    from services.image_generator import ImageGenerator
+    from services.pipeline import stream_campaign
+    from services.retry_queue import RetryQueue
+    from services.send_journal import SendJournal
+
+    settings = Settings()
+    campaign = load_campaign(args.campaign)
+    parallelism = campaign.get('parallelism', {})
+    send_workers = int(args.workers or parallelism.get('send_workers', settings.SEND_WORKERS))
+    rate_limit = parallelism.get('rate_limit', settings.RATE_LIMIT)
+    batch_size = int(parallelism.get('batch_size', 50))
+
+    # Import -> validate
+    start = time.perf_counter()
+    recipients = campaign['recipients']
+    summary = import_recipients(recipients, Path(recipients).name)
+    print(f"Imported {summary['rows']} recipients ({summary['rejected']} rejected) "
+          f"in {time.perf_counter() - start:.1f}s")
+    if summary['rejected']:
+        print(f"Rejected rows: {summary['rejected_path']}")
+
+    plan = CampaignPlan.from_dataframe(load_recipients(summary['path']), campaign.get('send_mode', 'Combine Days'))
+    style = render_settings(campaign)
+    generator = ImageGenerator(campaign['template'], **image_encoding(campaign, settings))
+    account = smtp_account(campaign, settings)
+
+    if campaign.get('schedule'):
+        # Scheduled sends attach saved images, so render them to disk now
+        from services.job_store import JobStore
+        from services.scheduler import make_job_rows
+
+        send_time = datetime.fromisoformat(str(campaign['schedule']))
+        images = generator.generate_batch(
+            plan.render_rows(),
+            workers=settings.IMAGE_WORKERS,
+            chunk_size=settings.IMAGE_CHUNK_SIZE,
+            **style
+        )
+        jobs = plan.jobs(campaign['subject'], campaign['body'], images)
+
+        # Only queue the jobs: loading a scheduler here would also dispatch
+        # due jobs that belong to the app or 'smartmailer scheduler'
+        store = JobStore()
+        store.add_many(make_job_rows(send_time, jobs, *account))
+        store.close()
+        print(f"Scheduled {len(jobs)} emails for {send_time:%Y-%m-%d %H:%M}; they are sent by the "
+              f"running app or 'python -m smartmailer scheduler'")
+        if args.metrics:
+            metrics.write(args.metrics)
+        return 0
+
+    # Render -> send, overlapped; jobs are built as the renderer reaches them
+    jobs = plan.iter_jobs(campaign['subject'], campaign['body'])
+    campaign_id = args.campaign_id or campaign.get('campaign_id') or Path(args.campaign).stem
+    start = time.perf_counter()
+    with SendJournal() as journal:
+        # Retries reuse this sender, so they keep the campaign's account
+        # assignments and cool-downs; the retry queue closes it
+        sender = make_sender(campaign, settings, account, send_workers, rate_limit)
+        try:
+            results = stream_campaign(
+                generator,
+                sender,
+                jobs,
+                style,
+                batch_size=batch_size,
+                workers=send_workers,
+                progress_callback=None if args.quiet else print_progress,
+                journal=journal,
+                campaign_id=campaign_id,
+                total=len(plan),
+                render_workers=settings.IMAGE_WORKERS
+            )
+        except BaseException:
+            sender.close()
+            raise
+
+        retries = [i for i, r in enumerate(results) if r['status'] == TRANSIENT]
+        if retries:
+            print(f"Retrying {len(retries)} emails after temporary errors...")
+            final = {}
+
+            def render_image(job):
+                job = dict(job)
+                job['image_data'], job['image_name'] = generator.render_bytes(job['name'], job['date'], **style)
+                return job
+
+            retry_queue = RetryQueue(
+                sender,
+                base_delay=float(parallelism.get('retry_base_delay', 30)),
+                max_attempts=int(parallelism.get('max_attempts', 5)),
+                retry_budget=int(parallelism.get('retry_budget', max(10, len(plan) // 10))),
+                journal=journal,
+                campaign_id=campaign_id,
+                on_result=lambda job, result: final.__setitem__(job['index'], result),
+                prepare=render_image
+            )
+            for i in retries:
+                retry_queue.submit(dict(plan.job(i, campaign['subject'], campaign['body']), index=i), results[i])
+            retry_queue.wait()
+            retry_queue.close()
+            for i, result in final.items():
+                results[i] = result
+        else:
+            sender.close()
+
+        if isinstance(sender, AccountPool):
+            for row in sender.stats():
+                quota = f"/{row['daily_quota']}" if row['daily_quota'] else ""
+                print(f"  {row['account']}: {row['sent']} sent, {row['failed']} failed, "
+                      f"{row['sent_today']}{quota} today ({row['status']})")
+
+    elapsed = time.perf_counter() - start
+    sent = sum(1 for r in results if r['success'] and not r['skipped'])
+    skipped = sum(1 for r in results if r['skipped'])
+    failed = len(results) - sent - skipped
+    print(f"Sent {sent}/{len(results)} emails in {elapsed:.1f}s "
+          f"({skipped} already sent in campaign '{campaign_id}', {failed} failed)")
+    if args.metrics:
+        metrics.write(args.metrics)
+        print(f"Metrics written to {args.metrics}")
+    return 0 if not failed else 1
+
+
+def run_scheduler(args):
+    """Deliver persisted scheduled emails until interrupted"""
+    from services.scheduler import EmailScheduler
+
+    settings = Settings()
+    scheduler = EmailScheduler(send_workers=settings.SEND_WORKERS, rate_limit=settings.RATE_LIMIT)
+    scheduler.start()
+    print(f"Scheduler running with {scheduler.count_scheduled()} pending emails")
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    try:
+        while not stopping:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    scheduler.stop_scheduler()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='smartmailer', description="SmartMailer headless runner")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Import, render and send (or schedule) a campaign")
+    run.add_argument('campaign', help="Campaign YAML/JSON file")
+    run.add_argument('--workers', type=int, help="Parallel SMTP sessions (overrides the campaign)")
+    run.add_argument('--quiet', action='store_true', help="Only print the summary")
+    run.add_argument('--campaign-id', help="Journal ID used to resume (overrides the campaign)")
+    run.add_argument('--metrics', help="Write stage timings to this file (.json, or .prom for Prometheus text)")
+    run.set_defaults(func=run_campaign)
+
+    sched = commands.add_parser('scheduler', help="Deliver scheduled emails (foreground, for systemd)")
+    sched.set_defaults(func=run_scheduler)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the app packages (services, utils, config) from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
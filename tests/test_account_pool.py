@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from services.account_pool import AccountPool, QuotaLedger
+from services.email_sender import SENT, TRANSIENT, make_result
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = QuotaLedger(tmp_path / 'usage.db')
+    yield ledger
+    ledger.close()
+
+
+def make_pool(ledger, quotas, statuses=None, session=True):
+    """
+    Pool whose accounts answer from ``statuses`` (email -> status) instead of SMTP
+
+    Transient failures are session errors (throttling) unless ``session`` is False.
+    """
+    accounts = [
+        {'sender_email': f'a{i}@example.com', 'smtp_server': f'smtp{i}.example.com',
+         'smtp_port': 587, 'daily_quota': quota}
+        for i, quota in enumerate(quotas)
+    ]
+    pool = AccountPool(accounts, ledger=ledger)
+    for account in pool.accounts:
+        def send_job(job, email=account.email):
+            status = (statuses or {}).get(email, SENT)
+            return make_result(job['recipient'], status, session=session and status == TRANSIENT)
+        account.sender.send_job = send_job
+    return pool
+
+
+def jobs(count):
+    return [{'key': f'k{i}', 'recipient': f'r{i}@example.com'} for i in range(count)]
+
+
+def test_assignment_is_sticky_per_key(ledger):
+    pool = make_pool(ledger, [0, 0, 0])
+    first = {job['key']: pool.send_job(job)['account'] for job in jobs(50)}
+    second = {job['key']: pool.send_job(job)['account'] for job in jobs(50)}
+    pool.close()
+
+    assert first == second
+    assert len(set(first.values())) == 3
+
+
+def test_share_follows_remaining_quota(ledger):
+    pool = make_pool(ledger, [900, 100])
+    results = pool.send_many(jobs(500))
+    pool.close()
+
+    counts = {}
+    for result in results:
+        counts[result['account']] = counts.get(result['account'], 0) + 1
+    assert counts['a0@example.com'] > 3 * counts.get('a1@example.com', 0)
+
+
+def test_exhausted_quota_is_skipped_and_persisted(ledger):
+    pool = make_pool(ledger, [2, 0])
+    results = pool.send_many(jobs(10))
+    pool.close()
+
+    assert all(r['status'] == SENT for r in results)
+    assert sum(r['account'] == 'a0@example.com' for r in results) <= 2
+    assert ledger.sent_today('a0@example.com') + ledger.sent_today('a1@example.com') == 10
+
+
+def test_transient_failure_fails_over_and_cools_down(ledger):
+    pool = make_pool(ledger, [0, 0], statuses={'a0@example.com': TRANSIENT})
+    results = pool.send_many(jobs(20))
+    stats = {row['account']: row for row in pool.stats()}
+    pool.close()
+
+    assert all(r['account'] == 'a1@example.com' and r['status'] == SENT for r in results)
+    assert stats['a0@example.com']['status'].startswith('cooling down')
+    assert stats['a0@example.com']['failovers'] >= 1
+
+
+def test_new_day_resets_quota_usage(ledger, monkeypatch):
+    pool = make_pool(ledger, [5])
+    pool.send_many(jobs(5))
+    assert pool.send_job({'recipient': 'late@example.com'})['status'] == TRANSIENT
+
+    monkeypatch.setattr(ledger, 'today', lambda: '2099-01-01')
+    assert pool.send_job({'recipient': 'late@example.com'})['status'] == SENT
+    pool.close()
+
+    assert ledger.sent_today('a0@example.com', '2099-01-01') == 1
+
+
+def test_refused_recipient_neither_cools_down_nor_fails_over(ledger):
+    pool = make_pool(ledger, [0, 0], statuses={'a0@example.com': TRANSIENT}, session=False)
+    results = pool.send_many(jobs(40))
+    stats = {row['account']: row for row in pool.stats()}
+    pool.close()
+
+    greylisted = [r for r in results if r['account'] == 'a0@example.com']
+    assert greylisted and all(r['status'] == TRANSIENT for r in greylisted)
+    assert stats['a0@example.com']['status'] == 'ok'
+    assert stats['a0@example.com']['failovers'] == 0
+
+
+def test_waits_for_a_cooling_down_account(ledger):
+    pool = make_pool(ledger, [0, 0])
+    for account in pool.accounts:
+        account.throttled_until = time.monotonic() + 0.2
+
+    start = time.monotonic()
+    result = pool.send_job({'recipient': 'r@example.com'})
+    pool.close()
+
+    assert result['status'] == SENT
+    assert time.monotonic() - start >= 0.15
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from services.campaign import CampaignPlan
+
+
+def recipients():
+    return pd.DataFrame({
+        'Name': ['Bob', 'Ann', 'Ann'],
+        'Email': ['bob@example.com', 'ann@example.com', 'ann@example.com'],
+        'Date': pd.to_datetime(['2026-02-03', '2026-02-01', '2026-02-02'])
+    })
+
+
+def test_combine_days_joins_each_persons_dates():
+    plan = CampaignPlan.from_dataframe(recipients(), 'Combine Days')
+
+    assert len(plan) == 2
+    assert list(plan.render_rows()) == [
+        ('ann@example.com', 'Ann', '01/02/2026, 02/02/2026'),
+        ('bob@example.com', 'Bob', '03/02/2026')
+    ]
+
+
+def test_separate_days_keys_each_row():
+    plan = CampaignPlan.from_dataframe(recipients(), 'Separate Days')
+
+    assert list(plan.keys) == ['bob@example.com_0', 'ann@example.com_1', 'ann@example.com_2']
+    assert [row.date_text for row in plan] == ['03/02/2026', '01/02/2026', '02/02/2026']
+
+
+def test_jobs_personalize_bodies_and_skip_rows_without_images():
+    plan = CampaignPlan.from_dataframe(recipients(), 'Separate Days')
+
+    jobs = plan.jobs('Hi', 'Dear {name}', {'ann@example.com_1': 'a.png'})
+    assert len(jobs) == 1
+    assert jobs[0]['body'] == 'Dear Ann' and jobs[0]['image_path'] == 'a.png'
+
+    streamed = list(plan.iter_jobs('Hi', 'Dear {name}'))
+    assert [job['body'] for job in streamed] == ['Dear Bob', 'Dear Ann', 'Dear Ann']
+    assert streamed == [plan.job(i, 'Hi', 'Dear {name}') for i in range(len(plan))]
+    assert all('image_path' not in job for job in streamed)
+
+
+def test_unpersonalized_body_is_shared():
+    plan = CampaignPlan.from_dataframe(recipients(), 'Combine Days')
+    bodies = plan.bodies('Hello')
+
+    assert bodies == ['Hello', 'Hello'] and bodies[0] is bodies[1]
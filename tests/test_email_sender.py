@@ -0,0 +1,129 @@
+import smtplib
+import socket
+import ssl
+import threading
+import time
+
+from services.email_sender import (
+    PERMANENT, SENT, TRANSIENT, EmailSender, classify_error, is_session_error
+)
+
+
+class FailingPool:
+    """Stands in for SMTPConnectionPool, raising the given errors in order"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+
+    def send_message(self, msg):
+        if self.errors:
+            raise self.errors.pop(0)
+
+    def close(self):
+        pass
+
+
+def make_sender(*errors):
+    sender = EmailSender('me@example.com', '', 'smtp.example.com', 587)
+    sender.pool = FailingPool(*errors)
+    return sender
+
+
+def job(recipient='to@example.com'):
+    return {'recipient': recipient, 'subject': 'Hi', 'body': 'Hello'}
+
+
+def refused(code, message=b'4.7.1 Greylisted, try again later'):
+    return smtplib.SMTPRecipientsRefused({'to@example.com': (code, message)})
+
+
+def test_only_4xx_replies_and_dropped_connections_are_transient():
+    assert classify_error(refused(450)) == (TRANSIENT, 450)
+    assert classify_error(refused(550, b'5.1.1 No such user')) == (PERMANENT, 550)
+    assert classify_error(smtplib.SMTPDataError(451, b'4.3.0 Try later')) == (TRANSIENT, 451)
+    assert classify_error(smtplib.SMTPServerDisconnected('gone')) == (TRANSIENT, None)
+    assert classify_error(socket.timeout('timed out')) == (TRANSIENT, None)
+    assert classify_error(ConnectionResetError()) == (TRANSIENT, None)
+
+
+def test_other_smtp_tls_and_socket_errors_are_permanent():
+    assert classify_error(smtplib.SMTPNotSupportedError('no STARTTLS')) == (PERMANENT, None)
+    assert classify_error(ssl.SSLError('bad certificate')) == (PERMANENT, None)
+    assert classify_error(socket.gaierror('unknown host')) == (PERMANENT, None)
+    assert classify_error(smtplib.SMTPAuthenticationError(535, b'bad login')) == (PERMANENT, 535)
+
+
+def test_recipient_refusals_are_not_session_errors():
+    assert not is_session_error(refused(450))
+    assert not is_session_error(refused(452, b'4.2.2 Mailbox full'))
+    assert is_session_error(refused(421, b'4.7.0 Too many connections'))
+
+
+def test_session_errors():
+    assert is_session_error(smtplib.SMTPSenderRefused(451, b'4.7.1 Rate limited', 'me@example.com'))
+    assert is_session_error(smtplib.SMTPDataError(450, b'4.7.0 Slow down'))
+    assert not is_session_error(smtplib.SMTPDataError(451, b'4.3.0 Local error'))
+    assert is_session_error(smtplib.SMTPResponseException(421, b'Closing connection'))
+    assert is_session_error(smtplib.SMTPServerDisconnected('gone'))
+
+
+def test_greylisted_recipient_does_not_pause_the_sender():
+    sender = make_sender(refused(450))
+    result = sender.send_job(job())
+
+    assert result['status'] == TRANSIENT and not result['session']
+    assert sender.throttled_until == 0.0
+
+
+def test_throttling_reply_pauses_the_sender():
+    sender = make_sender(smtplib.SMTPDataError(450, b'4.7.0 Slow down'))
+    result = sender.send_job(job())
+
+    assert result['status'] == TRANSIENT and result['session']
+    assert sender.throttled_until > 0
+    sender.throttled_until = 0.0
+    assert sender.send_job(job())['status'] == SENT
+
+
+class SlowPool(FailingPool):
+    """Accepts every message after a delay, counting concurrent sends"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def send_message(self, msg):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+
+
+def test_send_many_sends_concurrently_and_keeps_job_order():
+    sender = EmailSender('me@example.com', '', 'smtp.example.com', 587, pool_size=4)
+    sender.pool = SlowPool(0.02)
+    progress = []
+
+    jobs = [job(f'r{i}@example.com') for i in range(12)]
+    results = sender.send_many(jobs, progress_callback=lambda done, total, result: progress.append(done))
+
+    assert [r['recipient'] for r in results] == [j['recipient'] for j in jobs]
+    assert all(r['status'] == SENT for r in results)
+    assert progress == list(range(1, 13))
+    assert sender.pool.peak == 4
+
+
+def test_send_many_respects_the_rate_limit():
+    sender = EmailSender('me@example.com', '', 'smtp.limited.example.com', 587,
+                         pool_size=4, rate_limit=50)
+    sender.pool = FailingPool()
+
+    start = time.monotonic()
+    sender.send_many([job(f'r{i}@example.com') for i in range(60)])
+    # 50 tokens of burst, then 10 more at 50/sec
+    assert time.monotonic() - start >= 0.18
@@ -0,0 +1,78 @@
+import os
+
+import pandas as pd
+from PIL import Image
+
+from services.campaign import CampaignPlan
+from services.image_cache import ImageCache
+from services.image_generator import ImageGenerator
+from services.message_factory import MessageFactory
+
+
+def make_generator(tmp_path, monkeypatch, **encoding):
+    # The cache lives under assets/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    Image.new('RGB', (200, 80), 'white').save('template.png')
+    return ImageGenerator('template.png', **encoding)
+
+
+def test_cached_images_are_attached_under_readable_names(tmp_path, monkeypatch):
+    generator = make_generator(tmp_path, monkeypatch, encoding='jpeg')
+    frame = pd.DataFrame({
+        'Name': ['John Doe'],
+        'Email': ['john@example.com'],
+        'Date': pd.to_datetime(['2026-02-01'])
+    })
+    plan = CampaignPlan.from_dataframe(frame, 'Combine Days')
+    images = generator.generate_batch(plan.render_rows(), font_size=20)
+
+    job = plan.jobs('Hi', 'Hello {name}', images)[0]
+    assert job['image_name'] == 'John_Doe_01-02-2026.jpg'
+
+    msg = MessageFactory('me@example.com').build(
+        job['recipient'], job['subject'], job['body'], job['image_path'], image_name=job['image_name']
+    )
+    attachment = msg.get_payload()[1]
+    assert attachment.get_filename() == 'John_Doe_01-02-2026.jpg'
+    assert attachment.get_content_type() == 'image/jpeg'
+
+
+def test_cache_hits_skip_rendering_and_changes_miss(tmp_path, monkeypatch):
+    generator = make_generator(tmp_path, monkeypatch)
+    rows = [('a', 'Ann', '01/02/2026'), ('b', 'Bob', '01/02/2026')]
+
+    first = generator.generate_batch(rows, font_size=20)
+    assert generator.cache_stats == {'hits': 0, 'misses': 2}
+
+    second = generator.generate_batch(rows + [('c', 'Cy', '01/02/2026')], font_size=20)
+    assert generator.cache_stats == {'hits': 2, 'misses': 1}
+    assert second['a'] == first['a'] and second['b'] == first['b']
+
+    generator.generate_batch(rows, font_size=21)
+    assert generator.cache_stats == {'hits': 0, 'misses': 2}
+
+
+def test_eviction_drops_least_recently_used_files_first(tmp_path):
+    cache = ImageCache(tmp_path, max_bytes=250)
+    paths = []
+    for i, key in enumerate(('aa11', 'bb22', 'cc33')):
+        path = cache.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+
+    # A hit makes the oldest file the most recently used
+    assert cache.get('aa11') == str(paths[0])
+    assert cache.evict() == 1
+    assert [p.exists() for p in paths] == [True, False, True]
+
+
+def test_eviction_keeps_the_current_batch(tmp_path):
+    cache = ImageCache(tmp_path, max_bytes=0)
+    path = cache.path_for('aa11')
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'x')
+
+    assert cache.evict(keep=[str(path)]) == 0
+    assert cache.get('bb22') is None
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from services.excel_service import import_recipients, iter_recipient_chunks, load_recipients
+from utils.validators import DUPLICATE, INVALID_EMAIL
+
+CSV = """Name,Email,Date
+Ann, Ann@Example.com ,01/02/2026
+Bob,bob@example.com,02/02/2026
+Cy,not-an-email,03/02/2026
+Ann,ann@example.com,01/02/2026
+Dee,dee@example.com,04/02/2026
+"""
+
+
+def test_csv_is_imported_in_chunks_with_duplicates_across_chunks(tmp_path):
+    source = tmp_path / 'list.csv'
+    source.write_text(CSV)
+
+    summary = import_recipients(str(source), 'list.csv', output_dir=tmp_path / 'out', chunk_size=2)
+
+    assert summary['rows'] == 3 and summary['rejected'] == 2
+    assert summary['rejected_reasons'] == {INVALID_EMAIL: 1, DUPLICATE: 1}
+    assert summary['unique_dates'] == 3
+    df = load_recipients(summary['path'])
+    assert list(df['Email']) == ['ann@example.com', 'bob@example.com', 'dee@example.com']
+    assert df['Date'].iloc[0] == pd.Timestamp('2026-02-01')
+    assert len(pd.read_csv(summary['rejected_path'])) == 2
+
+
+def test_xlsx_rows_are_streamed_with_typed_columns(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'Email', 'Date', 'Notes'])
+    for i in range(5):
+        sheet.append([f'Name {i}', f'r{i}@example.com', '01/02/2026', 'x'])
+    sheet.append([None, None, None, None])
+    workbook.save(tmp_path / 'list.xlsx')
+
+    chunks = list(iter_recipient_chunks(tmp_path / 'list.xlsx', 'list.xlsx', chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert list(chunks[0].columns) == ['Name', 'Email', 'Date']
+    assert str(chunks[0]['Date'].dtype) == 'datetime64[ns]'
+
+
+def test_missing_columns_and_unknown_types_are_rejected(tmp_path):
+    source = tmp_path / 'list.csv'
+    source.write_text("Name,Email\nAnn,ann@example.com\n")
+
+    with pytest.raises(ValueError, match='must contain columns'):
+        import_recipients(str(source), 'list.csv', output_dir=tmp_path / 'out')
+    with pytest.raises(ValueError, match='Unsupported file type'):
+        list(iter_recipient_chunks(source, 'list.txt'))
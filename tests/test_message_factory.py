@@ -0,0 +1,43 @@
+from services.message_factory import MessageFactory
+
+
+def test_bodies_and_attachments_are_encoded_once_and_shared():
+    factory = MessageFactory('me@example.com')
+    first = factory.build('a@example.com', 'Hi', 'Hello', image_data=b'png bytes', image_name='card.png')
+    second = factory.build('b@example.com', 'Hi', 'Hello', image_data=b'png bytes', image_name='card.png')
+
+    assert first['To'] == 'a@example.com' and second['To'] == 'b@example.com'
+    assert first.get_payload()[0] is second.get_payload()[0]
+    assert first.get_payload()[1] is second.get_payload()[1]
+
+
+def test_different_content_gets_its_own_parts():
+    factory = MessageFactory('me@example.com')
+    first = factory.build('a@example.com', 'Hi', 'Hello Ann', image_data=b'one', image_name='a.webp')
+    second = factory.build('a@example.com', 'Hi', 'Hello Bob', image_data=b'two', image_name='a.webp')
+
+    assert first.get_payload()[0] is not second.get_payload()[0]
+    assert first.get_payload()[1] is not second.get_payload()[1]
+    assert first.get_payload()[1].get_content_type() == 'image/webp'
+
+
+def test_file_parts_are_reread_when_the_file_changes(tmp_path):
+    path = tmp_path / 'card.png'
+    path.write_bytes(b'first')
+    factory = MessageFactory('me@example.com')
+
+    part = factory.file_part(path)
+    assert factory.file_part(path) is part
+    path.write_bytes(b'second version')
+    changed = factory.file_part(path)
+
+    assert changed is not part
+    assert changed.get_payload(decode=True) == b'second version'
+    assert factory.file_part(tmp_path / 'missing.png') is None
+
+
+def test_message_without_attachment():
+    msg = MessageFactory('me@example.com', body_cache_bytes=0).build('a@example.com', 'Hi', 'Hello')
+
+    assert msg['From'] == 'me@example.com' and msg['Subject'] == 'Hi'
+    assert len(msg.get_payload()) == 1
@@ -0,0 +1,105 @@
+import pytest
+from PIL import Image
+
+from services.email_sender import PERMANENT, SENT, SKIPPED, make_result, send_jobs
+from services.image_generator import ImageGenerator
+from services.pipeline import stream_campaign
+from services.send_journal import SendJournal
+
+STYLE = {'font_size': 20, 'color': '#000000', 'name_pos': (10, 10), 'date_pos': (10, 40)}
+
+
+class CollectingSender:
+    """Stands in for EmailSender; accepts every job and keeps it"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def send_many(self, jobs, workers=None, progress_callback=None,
+                  journal=None, campaign_id=None):
+        return send_jobs(self.send_job, jobs, workers or 1, progress_callback, journal, campaign_id)
+
+    def send_job(self, job):
+        self.jobs.append(job)
+        return make_result(job['recipient'], SENT)
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    # ImageGenerator creates its cache under assets/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    Image.new('RGB', (200, 80), 'white').save('template.png')
+    return ImageGenerator('template.png')
+
+
+def campaign_jobs(count):
+    return [
+        {'recipient': f'r{i}@example.com', 'subject': 'Hi', 'body': 'Hello',
+         'name': f'Name {i}', 'date': '01/02/2026'}
+        for i in range(count)
+    ]
+
+
+def test_render_processes_match_in_process_rendering(generator):
+    serial, parallel = CollectingSender(), CollectingSender()
+
+    stream_campaign(generator, serial, campaign_jobs(6), STYLE, batch_size=4)
+    results = stream_campaign(generator, parallel, campaign_jobs(6), STYLE, batch_size=4, render_workers=2)
+
+    assert [r['status'] for r in results] == [SENT] * 6
+    by_recipient = {job['recipient']: job['image_data'] for job in serial.jobs}
+    for job in parallel.jobs:
+        assert job['image_data'] == by_recipient[job['recipient']]
+        assert job['image_name'] == job['name'].replace(' ', '_') + '_01-02-2026.png'
+
+
+def test_sending_reports_progress_without_printing(generator, capsys):
+    progress = []
+    stream_campaign(generator, CollectingSender(), campaign_jobs(3), STYLE,
+                    progress_callback=lambda done, total, result: progress.append((done, total)))
+
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert capsys.readouterr().out == ''
+
+
+def test_render_failures_keep_their_place(generator):
+    jobs = campaign_jobs(4)
+    jobs[1]['date'] = None  # render_bytes needs a date string to name the file
+
+    sender = CollectingSender()
+    results = stream_campaign(generator, sender, jobs, STYLE, batch_size=2)
+
+    assert [r['status'] for r in results] == [SENT, PERMANENT, SENT, SENT]
+    assert results[1]['error'].startswith('Image render failed')
+    assert len(sender.jobs) == 3
+
+
+def test_journaled_jobs_are_neither_rendered_nor_sent(tmp_path, generator):
+    sender = CollectingSender()
+
+    with SendJournal(tmp_path / 'journal.db') as journal:
+        journal.record('spring', 'r0@example.com')
+        results = stream_campaign(generator, sender, campaign_jobs(3), STYLE,
+                                  journal=journal, campaign_id='spring')
+
+    assert [r['status'] for r in results] == [SKIPPED, SENT, SENT]
+    assert [job['recipient'] for job in sender.jobs] == ['r1@example.com', 'r2@example.com']
+
+
+def test_stopping_the_consumer_stops_the_renderer(generator):
+    rendered = []
+
+    def jobs():
+        for job in campaign_jobs(1000):
+            rendered.append(job['recipient'])
+            yield job
+
+    def stop(done, total, result):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        stream_campaign(generator, CollectingSender(), jobs(), STYLE,
+                        batch_size=5, queue_size=2, progress_callback=stop)
+
+    # At most the batches in flight and in the queue were rendered
+    assert len(rendered) <= 5 * (2 + 3)
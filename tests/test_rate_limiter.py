@@ -0,0 +1,24 @@
+import time
+
+from services.rate_limiter import TokenBucket, get_rate_limiter
+
+
+def test_burst_then_steady_rate():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+    for _ in range(10):
+        bucket.acquire()
+    # Ten more tokens at 50/sec take about 0.2 seconds
+    assert time.monotonic() - start >= 0.18
+
+
+def test_senders_share_a_bucket_per_server():
+    first = get_rate_limiter('smtp.shared.example.com', 5)
+    assert get_rate_limiter('smtp.shared.example.com', 5) is first
+    assert get_rate_limiter('smtp.other.example.com', 5) is not first
+    assert get_rate_limiter('smtp.shared.example.com', 5, 'me@example.com') is not first
+    assert get_rate_limiter('smtp.shared.example.com', 0) is None
@@ -0,0 +1,96 @@
+import threading
+
+from services.email_sender import PERMANENT, SENT, THROTTLE_PAUSE, TRANSIENT, make_result
+from services.retry_queue import RetryQueue, backoff_delay
+
+
+class ScriptedSender:
+    """Returns the given statuses in order, then SENT"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.sent = []
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def send_job(self, job):
+        with self.lock:
+            self.sent.append(job['recipient'])
+            status = self.statuses.pop(0) if self.statuses else SENT
+        return make_result(job['recipient'], status)
+
+    def close(self):
+        self.closed = True
+
+
+def failed(recipient, code=None):
+    return make_result(recipient, TRANSIENT, 'try later', code)
+
+
+def test_backoff_doubles_with_jitter_and_caps():
+    for attempt, base in ((1, 30), (2, 60), (3, 120)):
+        for _ in range(20):
+            assert 0.5 * base <= backoff_delay(attempt, 30) <= 1.5 * base
+    assert backoff_delay(20, 30, max_delay=900) <= 1.5 * 900
+
+
+def test_throttle_codes_never_retry_sooner_than_the_pause():
+    for _ in range(20):
+        assert backoff_delay(1, 0.01, code=421) >= THROTTLE_PAUSE
+
+
+def test_retries_until_sent():
+    sender = ScriptedSender(TRANSIENT)
+    results = []
+    queue = RetryQueue(sender, base_delay=0.01, on_result=lambda job, result: results.append(result))
+
+    assert queue.submit({'recipient': 'a@example.com'}, failed('a@example.com'))
+    assert queue.wait(timeout=5)
+    queue.close()
+
+    assert sender.sent == ['a@example.com', 'a@example.com']
+    assert [r['status'] for r in results] == [SENT]
+    assert queue.stats == {'retrying': 0, 'sent': 1, 'failed': 0}
+    assert sender.closed
+
+
+def test_permanent_errors_and_spent_attempts_are_final():
+    sender = ScriptedSender(TRANSIENT, TRANSIENT, TRANSIENT)
+    queue = RetryQueue(sender, base_delay=0.01, max_attempts=2)
+
+    assert not queue.submit({'recipient': 'p@example.com'}, make_result('p@example.com', PERMANENT))
+    assert queue.submit({'recipient': 't@example.com'}, failed('t@example.com'))
+    assert queue.wait(timeout=5)
+    queue.close()
+
+    assert sender.sent == ['t@example.com', 't@example.com']
+    assert queue.stats['failed'] == 2
+
+
+def test_budget_limits_retries_per_campaign():
+    sender = ScriptedSender()
+    queue = RetryQueue(sender, base_delay=0.01, retry_budget=2)
+
+    accepted = [queue.submit({'recipient': f'{i}@example.com'}, failed(f'{i}@example.com')) for i in range(4)]
+    assert queue.wait(timeout=5)
+    queue.close()
+
+    assert accepted == [True, True, False, False]
+    assert queue.stats == {'retrying': 0, 'sent': 2, 'failed': 2}
+
+
+def test_prepare_runs_once_on_the_retry_thread():
+    sender = ScriptedSender(TRANSIENT)
+    threads = []
+
+    def prepare(job):
+        threads.append(threading.current_thread())
+        return dict(job, image_data=b'png')
+
+    queue = RetryQueue(sender, base_delay=0.01, prepare=prepare)
+    queue.submit({'recipient': 'a@example.com'}, failed('a@example.com'))
+    assert queue.wait(timeout=5)
+    queue.close()
+
+    assert threads == [queue.thread]
+    assert queue.stats['sent'] == 1
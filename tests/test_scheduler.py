@@ -0,0 +1,216 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services.email_sender import SENT, TRANSIENT, make_result
+from services.job_store import JobStore
+from services.scheduler import EmailScheduler, make_job_rows
+
+
+class RecordingSender:
+    """Stands in for EmailSender; every message is accepted"""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_many(self, jobs, workers=None, progress_callback=None):
+        with self.lock:
+            self.sent.extend(job['id'] for job in jobs)
+        return [make_result(job['recipient'], SENT) for job in jobs]
+
+    def close(self):
+        pass
+
+
+def make_scheduler(db_path, sender):
+    scheduler = EmailScheduler(db_path=db_path)
+    scheduler._get_sender = lambda *account: sender
+    return scheduler
+
+
+def queue_jobs(db_path, count, send_time=None):
+    rows = make_job_rows(
+        send_time or datetime.now() - timedelta(seconds=1),
+        [{'recipient': f'r{i}@example.com', 'subject': 'Hi', 'body': 'Hello'} for i in range(count)],
+        'me@example.com', '', 'smtp.example.com', 587
+    )
+    store = JobStore(db_path)
+    store.add_many(rows)
+    store.close()
+    return [row['id'] for row in rows]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_claim_is_exclusive(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    job_ids = queue_jobs(db_path, 3)
+    first, second = JobStore(db_path), JobStore(db_path)
+
+    assert first.claim(job_ids[:2]) == job_ids[:2]
+    assert second.claim(job_ids) == job_ids[2:]
+    assert first.get(job_ids[0])['status'] == 'Sending'
+    first.close()
+    second.close()
+
+
+def test_two_schedulers_send_each_job_once(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    job_ids = queue_jobs(db_path, 10)
+    sender = RecordingSender()
+    schedulers = [make_scheduler(db_path, sender) for _ in range(2)]
+
+    assert wait_for(lambda: all(schedulers[0].get_status(i) == 'Sent' for i in job_ids))
+    for scheduler in schedulers:
+        scheduler.stop_scheduler()
+
+    assert sorted(sender.sent) == sorted(job_ids)
+
+
+def test_cancel_in_one_process_reaches_the_other(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    job_id = queue_jobs(db_path, 1, datetime.now() + timedelta(seconds=0.3))[0]
+    sender = RecordingSender()
+    owner = make_scheduler(db_path, sender)
+    other = make_scheduler(db_path, sender)
+    other.stop_scheduler()
+
+    assert other.cancel_email(job_id)
+    time.sleep(0.5)
+    owner.stop_scheduler()
+
+    assert sender.sent == []
+    assert owner.get_status(job_id) == 'Cancelled'
+
+
+def test_attachment_names_are_persisted(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    rows = make_job_rows(
+        datetime.now() + timedelta(hours=1),
+        [{'recipient': 'r@example.com', 'subject': 'Hi', 'body': 'Hello',
+          'image_path': 'assets/images/generated/ab/abcd.png', 'image_name': 'John_Doe_01-02-2026.png'}],
+        'me@example.com', '', 'smtp.example.com', 587
+    )
+    store = JobStore(db_path)
+    store.add_many(rows)
+    store.close()
+
+    scheduler = EmailScheduler(db_path=db_path)
+    job = scheduler.jobs[rows[0]['id']]
+    scheduler.stop_scheduler()
+    assert job['image_name'] == 'John_Doe_01-02-2026.png'
+
+
+def test_finished_jobs_are_evicted_from_memory(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    sent_ids = queue_jobs(db_path, 3)
+    later_ids = queue_jobs(db_path, 3, datetime.now() + timedelta(hours=1))
+    scheduler = make_scheduler(db_path, RecordingSender())
+
+    assert wait_for(lambda: all(scheduler.get_status(i) == 'Sent' for i in sent_ids))
+    assert scheduler.cancel_email(later_ids[0])
+    scheduler.stop_scheduler()
+
+    assert set(scheduler.jobs) == set(later_ids[1:])
+    assert scheduler.get_status(later_ids[0]) == 'Cancelled'
+    assert scheduler.count_scheduled() == 2
+
+
+def test_scheduled_emails_are_paged_in_send_time_order(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    start = datetime.now() + timedelta(hours=1)
+    ids = [queue_jobs(db_path, 1, start + timedelta(minutes=i))[0] for i in (3, 1, 2, 0)]
+    scheduler = EmailScheduler(db_path=db_path)
+    scheduler.stop_scheduler()
+
+    assert [job['id'] for job in scheduler.get_scheduled_emails(1, 2)] == [ids[1], ids[2]]
+    assert len(scheduler.get_scheduled_emails()) == 4
+
+
+def test_pending_jobs_survive_a_restart(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    first = EmailScheduler(db_path=db_path)
+    first._get_sender = lambda *account: RecordingSender()
+    job_ids = first.schedule_emails(
+        datetime.now() + timedelta(hours=1),
+        [{'recipient': 'r@example.com', 'subject': 'Hi', 'body': 'Hello', 'image_path': None}],
+        'me@example.com', '', 'smtp.example.com', 587
+    )
+    first.stop_scheduler()
+
+    second = EmailScheduler(db_path=db_path)
+    second.stop_scheduler()
+    assert [job['id'] for job in second.get_scheduled_emails()] == job_ids
+
+
+def test_jobs_are_sent_when_due(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    sender = RecordingSender()
+    scheduler = make_scheduler(db_path, sender)
+    job_id = scheduler.schedule_email(
+        datetime.now() + timedelta(seconds=0.3), 'r@example.com', 'Hi', 'Hello', None,
+        'me@example.com', '', 'smtp.example.com', 587
+    )
+
+    assert scheduler.get_status(job_id) == 'Scheduled'
+    assert wait_for(lambda: scheduler.get_status(job_id) == 'Sent')
+    scheduler.stop_scheduler()
+    assert sender.sent == [job_id]
+
+
+def test_transient_failures_are_retried_with_backoff(tmp_path):
+    db_path = tmp_path / 'scheduler.db'
+    job_id = queue_jobs(db_path, 1)[0]
+    sender = RecordingSender()
+    sender.send_many = lambda jobs, workers=None: [
+        make_result(job['recipient'], TRANSIENT, 'try later', 451) for job in jobs
+    ]
+    scheduler = make_scheduler(db_path, sender)
+
+    assert wait_for(lambda: scheduler.get_status(job_id) == 'Retrying')
+    scheduler.stop_scheduler()
+    store = JobStore(db_path)
+    row = store.get(job_id)
+    store.close()
+    assert row['attempts'] == 1 and row['last_error'] == 'try later'
+    assert row['send_time'] > time.time()
+
+
+
+def test_co_scheduled_jobs_go_out_in_batches_per_account(tmp_path, monkeypatch):
+    from services import scheduler as scheduler_module
+
+    monkeypatch.setattr(scheduler_module, 'MAX_BATCH_SIZE', 4)
+    db_path = tmp_path / 'scheduler.db'
+    send_time = datetime.now() - timedelta(seconds=1)
+    store = JobStore(db_path)
+    for account in ('a@example.com', 'b@example.com'):
+        store.add_many(make_job_rows(
+            send_time,
+            [{'recipient': f'r{i}@example.com', 'subject': 'Hi', 'body': 'Hello'} for i in range(5)],
+            account, '', 'smtp.example.com', 587
+        ))
+    store.close()
+
+    batches = []
+
+    class BatchSender(RecordingSender):
+        def send_many(self, jobs, workers=None, progress_callback=None):
+            with self.lock:
+                batches.append((jobs[0]['account'][0], len({job['account'] for job in jobs}), len(jobs)))
+            return super().send_many(jobs, workers)
+
+    scheduler = make_scheduler(db_path, BatchSender())
+    assert wait_for(lambda: sum(size for _, _, size in batches) == 10)
+    scheduler.stop_scheduler()
+
+    assert sorted(batches) == [
+        ('a@example.com', 1, 1), ('a@example.com', 1, 4),
+        ('b@example.com', 1, 1), ('b@example.com', 1, 4)
+    ]
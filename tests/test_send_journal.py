@@ -0,0 +1,71 @@
+from services.send_journal import SendJournal
+
+
+def test_records_survive_reopen(tmp_path):
+    db_path = tmp_path / 'journal.db'
+    with SendJournal(db_path) as journal:
+        journal.record('spring', 'a@example.com', 'a@example.com')
+        journal.record('spring', 'b@example.com_3', 'b@example.com')
+        journal.record('autumn', 'a@example.com', 'a@example.com')
+
+    with SendJournal(db_path) as journal:
+        assert journal.sent_keys('spring') == {'a@example.com', 'b@example.com_3'}
+        assert journal.is_sent('autumn', 'a@example.com')
+        assert not journal.is_sent('autumn', 'b@example.com_3')
+
+
+def test_recording_a_key_twice_is_harmless(tmp_path):
+    with SendJournal(tmp_path / 'journal.db') as journal:
+        journal.record('spring', 'a@example.com')
+        journal.record('spring', 'a@example.com')
+        journal.flush()
+        assert journal.sent_keys('spring') == {'a@example.com'}
+
+
+def test_send_many_skips_journaled_jobs(tmp_path):
+    from services.email_sender import SENT, SKIPPED, make_result, send_jobs
+
+    sent = []
+
+    def send_job(job):
+        sent.append(job['recipient'])
+        return make_result(job['recipient'], SENT)
+
+    jobs = [{'key': f'k{i}', 'recipient': f'r{i}@example.com'} for i in range(4)]
+    with SendJournal(tmp_path / 'journal.db') as journal:
+        journal.record('spring', 'k1')
+        results = send_jobs(send_job, jobs, 2, journal=journal, campaign_id='spring')
+        assert journal.sent_keys('spring') == {'k0', 'k1', 'k2', 'k3'}
+
+    assert [r['status'] for r in results] == [SENT, SKIPPED, SENT, SENT]
+    assert sorted(sent) == ['r0@example.com', 'r2@example.com', 'r3@example.com']
+
+
+def test_stopped_send_many_journals_every_accepted_message(tmp_path):
+    import threading
+    import time
+
+    import pytest
+
+    from services.email_sender import SENT, make_result, send_jobs
+
+    sent = []
+    lock = threading.Lock()
+
+    def send_job(job):
+        time.sleep(0.01)
+        with lock:
+            sent.append(job['key'])
+        return make_result(job['recipient'], SENT)
+
+    def progress(done, total, result):
+        if done == 3:
+            raise KeyboardInterrupt
+
+    jobs = [{'key': f'k{i}', 'recipient': f'r{i}@example.com'} for i in range(50)]
+    with SendJournal(tmp_path / 'journal.db') as journal:
+        with pytest.raises(KeyboardInterrupt):
+            send_jobs(send_job, jobs, 4, progress, journal=journal, campaign_id='spring')
+        time.sleep(0.1)
+        assert len(sent) < len(jobs)
+        assert journal.sent_keys('spring') == set(sent)
@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from config import settings as settings_module
+from config.settings import Settings, get_settings
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    # Settings reads config/config.json from the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings_module, '_settings', None)
+    (tmp_path / 'config').mkdir()
+    return tmp_path / 'config'
+
+
+def write_config(config_dir, mtime, **values):
+    path = config_dir / 'config.json'
+    path.write_text(json.dumps(values))
+    os.utime(path, (mtime, mtime))
+
+
+def test_settings_are_shared_and_reloaded_only_after_a_change(config_dir, monkeypatch):
+    write_config(config_dir, 1000, send_workers=8)
+    settings = get_settings()
+    assert settings.SEND_WORKERS == 8
+
+    loads = []
+    original = Settings.load_config
+    monkeypatch.setattr(Settings, 'load_config', lambda self: loads.append(1) or original(self))
+
+    assert get_settings() is settings
+    assert loads == []
+
+    write_config(config_dir, 2000, send_workers=2)
+    assert get_settings() is settings
+    assert settings.SEND_WORKERS == 2 and loads == [1]
+
+
+def test_saving_does_not_trigger_a_reload(config_dir, monkeypatch):
+    settings = get_settings()
+    settings.SEND_WORKERS = 6
+    settings.save_config()
+
+    loads = []
+    monkeypatch.setattr(Settings, 'load_config', lambda self: loads.append(1))
+    assert get_settings().SEND_WORKERS == 6
+    assert loads == []
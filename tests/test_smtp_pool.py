@@ -0,0 +1,88 @@
+import smtplib
+
+import pytest
+
+from services import smtp_pool
+from services.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; send_message raises the queued errors in order"""
+
+    errors = []
+    opened = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = 0
+        self.closed = False
+        FakeSMTP.opened.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return 250, b'OK'
+
+    def send_message(self, msg):
+        if FakeSMTP.errors:
+            raise FakeSMTP.errors.pop(0)
+        self.sent += 1
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeSMTP.errors = []
+    FakeSMTP.opened = []
+    monkeypatch.setattr(smtp_pool.smtplib, 'SMTP', FakeSMTP)
+    pool = SMTPConnectionPool('me@example.com', 'secret', 'smtp.example.com', 587,
+                              max_size=2, max_messages_per_connection=3)
+    yield pool
+    pool.close()
+
+
+def refused(code):
+    return smtplib.SMTPRecipientsRefused({'to@example.com': (code, b'refused')})
+
+
+def test_connections_are_reused_and_recycled(pool):
+    for _ in range(4):
+        pool.send_message('msg')
+
+    assert [conn.sent for conn in FakeSMTP.opened] == [3, 1]
+    assert FakeSMTP.opened[0].closed
+
+
+def test_disconnect_is_retried_on_a_fresh_connection(pool):
+    FakeSMTP.errors = [smtplib.SMTPServerDisconnected('gone')]
+    pool.send_message('msg')
+
+    assert len(FakeSMTP.opened) == 2
+    assert FakeSMTP.opened[0].closed and FakeSMTP.opened[1].sent == 1
+
+
+def test_refused_recipient_keeps_the_connection(pool):
+    FakeSMTP.errors = [refused(550)]
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_message('msg')
+    pool.send_message('msg')
+
+    assert len(FakeSMTP.opened) == 1
+
+
+def test_421_refusal_discards_the_connection(pool):
+    FakeSMTP.errors = [refused(421)]
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_message('msg')
+    pool.send_message('msg')
+
+    assert len(FakeSMTP.opened) == 2
+    assert FakeSMTP.opened[0].closed
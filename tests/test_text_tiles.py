@@ -0,0 +1,54 @@
+import pytest
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from services.text_tiles import TextTileCache
+
+COLOR = (20, 40, 60)
+
+
+@pytest.fixture
+def font():
+    return ImageFont.load_default()
+
+
+def drawn(size, position, text, font, background=(255, 255, 255, 255)):
+    img = Image.new('RGBA', size, background)
+    ImageDraw.Draw(img).text(position, text, fill=COLOR, font=font)
+    return img
+
+
+def tiled(cache, size, position, text, font, background=(255, 255, 255, 255)):
+    img = Image.new('RGBA', size, background)
+    cache.draw(img, position, text, font, 'default', COLOR)
+    return img
+
+
+@pytest.mark.parametrize('background', [(255, 255, 255, 255), (0, 0, 0, 0)])
+@pytest.mark.parametrize('position', [(10, 10), (0, 0), (-3, -2), (190, 90)])
+@pytest.mark.parametrize('text', ['Ada Lovelace', '15/03/2024, 20/03/2024', 'Two\nlines'])
+def test_matches_draw_text(font, position, text, background):
+    cache = TextTileCache()
+    expected = drawn((200, 100), position, text, font, background)
+    actual = tiled(cache, (200, 100), position, text, font, background)
+    assert ImageChops.difference(expected, actual).getbbox() is None
+
+
+@pytest.mark.parametrize('position, text', [((-50, 40), 'Al'), ((-10, -5), ''), ((500, 10), 'x'), ((10, 500), 'x')])
+def test_off_canvas_text_draws_nothing(font, position, text):
+    cache = TextTileCache()
+    img = tiled(cache, (100, 100), position, text, font)
+    assert ImageChops.difference(img, drawn((100, 100), position, text, font)).getbbox() is None
+
+
+def test_tiles_are_reused_and_bounded(font):
+    cache = TextTileCache()
+    for _ in range(3):
+        tiled(cache, (100, 50), (5, 5), 'Same', font)
+    assert (cache.misses, cache.hits) == (1, 2)
+
+    tile, _ = cache.get('Same', font, 'default', COLOR)
+    small = TextTileCache(max_bytes=tile.width * tile.height * 4)
+    small.get('Same', font, 'default', COLOR)
+    small.get('Other', font, 'default', COLOR)
+    assert small.size <= small.max_bytes
+    assert len(small.tiles) == 1
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from utils.validators import (
+    DUPLICATE, INVALID_DATE, INVALID_EMAIL, MISSING_NAME, validate_recipients
+)
+
+
+def frame(rows):
+    df = pd.DataFrame(rows, columns=['Name', 'Email', 'Date'])
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d', errors='coerce')
+    return df
+
+
+def test_normalizes_and_accepts_valid_rows():
+    clean, rejected = validate_recipients(frame([
+        ('  Ada Lovelace ', ' Ada@Example.COM ', '2024-03-15')
+    ]))
+
+    assert rejected.empty
+    assert clean.iloc[0]['Name'] == 'Ada Lovelace'
+    assert clean.iloc[0]['Email'] == 'ada@example.com'
+
+
+def test_rejects_with_reason_in_priority_order():
+    clean, rejected = validate_recipients(frame([
+        ('', 'not-an-email', None),
+        ('Bob', 'bob@example', '2024-03-15'),
+        ('Cy', 'cy@example.com', 'not a date'),
+        ('Di', 'di@example.com', '2024-03-15'),
+        ('Di again', 'DI@example.com', '2024-03-15'),
+        ('Di', 'di@example.com', '2024-03-16'),
+    ]))
+
+    assert list(rejected['Reason']) == [MISSING_NAME, INVALID_EMAIL, INVALID_DATE, DUPLICATE]
+    assert list(clean['Email']) == ['di@example.com', 'di@example.com']
+
+
+def test_duplicates_across_chunks_with_shared_seen_set():
+    seen = set()
+    first, _ = validate_recipients(frame([('Ann', 'ann@example.com', '2024-01-01')]), seen)
+    second, rejected = validate_recipients(frame([
+        ('Ann', 'ann@example.com', '2024-01-01'),
+        ('Ann', 'ann@example.com', '2024-01-02'),
+    ]), seen)
+
+    assert len(first) == 1
+    assert list(rejected['Reason']) == [DUPLICATE]
+    assert len(second) == 1
+    assert len(seen) == 2
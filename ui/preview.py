@@ -0,0 +1,103 @@
+from io import BytesIO
+
+import streamlit as st
+from PIL import Image
+
+from services.image_generator import ImageGenerator, flatten_image
+
+# Longest side of preview renders and thumbnails, in pixels
+PREVIEW_MAX_DIMENSION = 640
+THUMBNAIL_MAX_DIMENSION = 320
+
+# Rows rendered by the live preview
+PREVIEW_ROWS = 3
+
+
+class PreviewGenerator(ImageGenerator):
+    def __init__(self, template_path, max_dimension=PREVIEW_MAX_DIMENSION):
+        """
+        ImageGenerator that draws on a downscaled copy of the template
+
+        Font size and text positions are given in template pixels, as for
+        ImageGenerator, and scaled down with the template, so the preview
+        shows the same layout as the full-resolution images.
+        """
+        super().__init__(template_path)
+        self.preview_dimension = max_dimension
+        self.scale = 1.0
+
+    def _get_template(self):
+        if self._template is None:
+            template = super()._get_template()
+            if max(template.size) > self.preview_dimension:
+                self.scale = self.preview_dimension / max(template.size)
+                size = (max(1, round(template.width * self.scale)), max(1, round(template.height * self.scale)))
+                self._template = template.resize(size, Image.BILINEAR)
+        return self._template
+
+    def render(self, name, date, font_size=40, color="#000000",
+               name_pos=(100, 100), date_pos=(100, 200)):
+        self._get_template()
+        scale = self.scale
+        return super().render(
+            name,
+            date,
+            max(1, round(font_size * scale)),
+            color,
+            (round(name_pos[0] * scale), round(name_pos[1] * scale)),
+            (round(date_pos[0] * scale), round(date_pos[1] * scale))
+        )
+
+
+def to_jpeg(img, quality=80):
+    buffer = BytesIO()
+    flatten_image(img).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+@st.cache_resource(max_entries=4)
+def get_preview_generator(template_path, template_digest):
+    """Decoded, downscaled template; template_digest (content hash) invalidates on re-upload"""
+    return PreviewGenerator(template_path)
+
+
+@st.cache_data(max_entries=256)
+def render_preview(template_path, template_digest, rows, font_size, color, name_pos, date_pos):
+    """
+    Render sample rows at preview resolution
+
+    Memoized per setting combination, so moving a slider back to an
+    earlier value is instant.
+
+    Args:
+        template_path, template_digest: Template file and a hash of its bytes
+        rows: Tuple of (name, date_text) pairs
+        font_size, color, name_pos, date_pos: As for ImageGenerator.render
+
+    Returns:
+        List of JPEG bytes, one per row
+    """
+    generator = get_preview_generator(template_path, template_digest)
+    return [
+        to_jpeg(generator.render(name, date, font_size, color, name_pos, date_pos))
+        for name, date in rows
+    ]
+
+
+@st.cache_data(max_entries=64)
+def thumbnail(path, mtime, max_dimension=THUMBNAIL_MAX_DIMENSION):
+    """Small JPEG of an image file for preview grids; mtime invalidates"""
+    with Image.open(path) as img:
+        img.draft('RGB', (max_dimension, max_dimension))
+        img.thumbnail((max_dimension, max_dimension))
+        return to_jpeg(img)
+
+
+def sample_rows(plan, count=PREVIEW_ROWS):
+    """First rows of a campaign plan as (name, date_text) pairs"""
+    rows = []
+    for recipient in plan:
+        rows.append((str(recipient.name), str(recipient.date_text)))
+        if len(rows) >= count:
+            break
+    return tuple(rows)
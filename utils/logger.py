@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Campaign stages timed by the services, in pipeline order
+STAGES = (
+    'import', 'validation', 'template_load', 'render', 'encode',
+    'mime_build', 'connect', 'starttls', 'login', 'send'
+)
+
+# Histogram bucket upper bounds in seconds (100us .. ~100s, x2 steps)
+BUCKETS = tuple(0.0001 * 2 ** i for i in range(21))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within a bucket"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Approximate the q-quantile (0..1) in seconds"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max
+        }
+
+
+class Metrics:
+    def __init__(self):
+        """
+        In-process timings and counters for campaign hot paths
+
+        Services record into the shared ``metrics`` instance; the Streamlit
+        panel and the command line read it back with snapshot() or export
+        it with to_json() / to_prometheus(). Recording costs a lock and a
+        few arithmetic operations, so it stays on during campaigns.
+        """
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.timings = {}
+            self.counters = {}
+            self.errors = {}
+            self.started = time.time()
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage"""
+        with self.lock:
+            histogram = self.timings.get(stage)
+            if histogram is None:
+                histogram = self.timings[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the body of a with-block; failures are recorded as errors"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(stage, e)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name, amount=1):
+        """Add to a counter, e.g. 'emails_sent' or 'image_cache_hits'"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def error(self, stage, exc):
+        """
+        Count an error by stage and exception class
+
+        An exception is counted once, under the first (innermost) stage
+        that reports it, e.g. a failed login is not counted again as a
+        failed send.
+        """
+        if getattr(exc, '_metrics_stage', None):
+            return
+        try:
+            exc._metrics_stage = stage
+        except AttributeError:
+            pass
+        key = (stage, type(exc).__name__)
+        with self.lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def snapshot(self):
+        """
+        Current metrics as plain data
+
+        Returns:
+            Dict with 'uptime' (seconds since reset), 'timings'
+            (stage -> count/total/mean/p50/p95/p99/max in seconds),
+            'counters' and 'errors' (list of stage/error/count dicts)
+        """
+        with self.lock:
+            return {
+                'uptime': time.time() - self.started,
+                'timings': {stage: h.summary() for stage, h in self.timings.items()},
+                'counters': dict(self.counters),
+                'errors': [
+                    {'stage': stage, 'error': name, 'count': count}
+                    for (stage, name), count in sorted(self.errors.items())
+                ]
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP smartmailer_stage_seconds Time spent per campaign stage',
+            '# TYPE smartmailer_stage_seconds histogram'
+        ]
+        with self.lock:
+            for stage, h in sorted(self.timings.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'smartmailer_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'smartmailer_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'smartmailer_stage_seconds_sum{{stage="{stage}"}} {h.total}')
+                lines.append(f'smartmailer_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'# TYPE smartmailer_{name}_total counter')
+                lines.append(f'smartmailer_{name}_total {value}')
+
+            lines.append('# TYPE smartmailer_errors_total counter')
+            for (stage, name), count in sorted(self.errors.items()):
+                lines.append(f'smartmailer_errors_total{{stage="{stage}",error="{name}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write metrics to a file; '.prom'/'.txt' get Prometheus text, anything else JSON"""
+        text = self.to_prometheus() if str(path).endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+# Shared by every service in the process
+metrics = Metrics()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# Practical address syntax check: local part, "@", dotted domain with a TLD
+EMAIL_PATTERN = (
+    r"[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+"
+    r"@[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+    r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*"
+    r"\.[A-Za-z]{2,}"
+)
+
+# Rejection reasons, in priority order
+MISSING_NAME = 'Missing name'
+INVALID_EMAIL = 'Invalid email'
+INVALID_DATE = 'Invalid date'
+DUPLICATE = 'Duplicate email and date'
+
+
+def normalize_recipients(df):
+    """Trim names and trim/lowercase emails without a per-row loop"""
+    df = df.copy()
+    df['Name'] = df['Name'].astype('string').str.strip().astype(object)
+    df['Email'] = df['Email'].astype('string').str.strip().str.lower().astype(object)
+    return df
+
+
+def validate_recipients(df, seen=None):
+    """
+    Normalize and validate a recipient frame in one vectorized pass
+
+    Args:
+        df: DataFrame with Name, Email and Date (datetime64) columns
+        seen: Optional set of (Email, Date) hashes from earlier chunks;
+            it is updated in place so duplicates across chunks are caught
+
+    Returns:
+        (clean, rejected) DataFrames. ``rejected`` has the same columns
+        plus a 'Reason' column.
+    """
+    df = normalize_recipients(df)
+
+    name = df['Name'].astype('string')
+    email = df['Email'].astype('string')
+
+    missing_name = name.isna() | (name == '')
+    invalid_email = ~email.str.fullmatch(EMAIL_PATTERN).fillna(False).astype(bool)
+    invalid_date = df['Date'].isna()
+
+    # Only rows that pass the other checks can claim an (Email, Date) pair
+    candidate = (~(missing_name | invalid_email | invalid_date)).to_numpy(dtype=bool)
+    hashes = pd.util.hash_pandas_object(df[['Email', 'Date']], index=False).to_numpy()
+    duplicate = np.zeros(len(df), dtype=bool)
+    duplicate[candidate] = pd.Series(hashes[candidate]).duplicated().to_numpy()
+    if seen:
+        duplicate |= candidate & np.isin(hashes, np.fromiter(seen, dtype=np.uint64, count=len(seen)))
+
+    reason = np.select(
+        [missing_name, invalid_email, invalid_date, duplicate],
+        [MISSING_NAME, INVALID_EMAIL, INVALID_DATE, DUPLICATE],
+        default=''
+    )
+    valid = reason == ''
+
+    if seen is not None:
+        seen.update(hashes[valid].tolist())
+
+    clean = df[valid]
+    rejected = df[~valid].assign(Reason=reason[~valid])
+    return clean, rejected